@@ -0,0 +1,106 @@
+"""地名提取微基准：对比原有的正则 + pandas 路径与 gazetteer 词典
+
+用法：python benchmarks/bench_gazetteer.py [标题数量]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+from gazetteer import Gazetteer, MAPPING_FILE, load_mapping_rows  # noqa: E402
+
+FILLERS = [
+    "关于印发", "光伏发电", "项目管理办法", "的通知", "储能", "新能源", "实施方案", "2024年",
+    "分布式", "电力市场", "交易规则", "征求意见稿", "风电", "补贴政策", "氢能产业", "发展规划",
+]
+
+
+# 原有实现：按字段拼接的正则 + 每篇文章在 DataFrame 上做布尔筛选
+class LegacyTagger:
+    def __init__(self, csv_path):
+        self.df_mapping = pd.read_csv(csv_path)
+        china_province = set(self.df_mapping['province'].tolist())
+        china_cities = self.df_mapping.groupby('province')['city'].apply(list).to_dict()
+        self.province_regex = re.compile("|".join(china_province))
+        self.city_regex = re.compile("|".join([city for cities in china_cities.values() for city in cities]))
+
+    def find_province_for_city(self, city_name):
+        match = self.df_mapping[self.df_mapping['city'] == city_name]
+        if not match.empty:
+            return match.iloc[0]['province']
+        return None
+
+    def tag_first(self, title_text):
+        found_provinces = self.province_regex.findall(title_text)
+        found_cities = self.city_regex.findall(title_text)
+        valid_provinces = set(self.df_mapping['province'].tolist())
+        valid_cities = set(self.df_mapping['city'].tolist())
+        first_province = next((p for p in found_provinces if p in valid_provinces), None)
+        first_city = next((c for c in found_cities if c in valid_cities), None)
+        if first_city and not first_province:
+            province_from_city = self.find_province_for_city(first_city)
+            if province_from_city:
+                first_province = province_from_city
+        return first_province, first_city
+
+    def tag_all(self, title_text):
+        found_provinces = self.province_regex.findall(title_text)
+        found_cities = self.city_regex.findall(title_text)
+        if found_cities and not found_provinces:
+            province_from_city = self.find_province_for_city(found_cities[0])
+            if province_from_city:
+                found_provinces.append(province_from_city)
+        province_text = ", ".join(found_provinces) if found_provinces else None
+        city_text = ", ".join(found_cities) if found_cities else None
+        return province_text, city_text
+
+
+# 用映射表中的地名和常见政策用语随机拼出标题
+def build_corpus(rows, size, seed=42):
+    rng = random.Random(seed)
+    names = [name for row in rows for name in row]
+    corpus = []
+    for _ in range(size):
+        parts = rng.sample(FILLERS, 4)
+        for _ in range(rng.randint(0, 2)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(names))
+        corpus.append("".join(parts))
+    return corpus
+
+
+def timed(func, corpus):
+    start = time.perf_counter()
+    results = [func(title) for title in corpus]
+    return time.perf_counter() - start, results
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rows = load_mapping_rows(MAPPING_FILE)
+    corpus = build_corpus(rows, size)
+
+    start = time.perf_counter()
+    legacy = LegacyTagger(MAPPING_FILE)
+    legacy_build = time.perf_counter() - start
+    start = time.perf_counter()
+    gazetteer = Gazetteer(rows)
+    gazetteer_build = time.perf_counter() - start
+    print(f"标题数量：{size}")
+    print(f"构建耗时  正则+pandas {legacy_build * 1000:8.1f} ms   gazetteer {gazetteer_build * 1000:8.1f} ms")
+
+    for mode in ("tag_first", "tag_all"):
+        legacy_time, legacy_results = timed(getattr(legacy, mode), corpus)
+        gazetteer_time, gazetteer_results = timed(getattr(gazetteer, mode), corpus)
+        differences = sum(1 for a, b in zip(legacy_results, gazetteer_results) if a != b)
+        print(
+            f"{mode:<9} 正则+pandas {legacy_time:8.3f} s   gazetteer {gazetteer_time:8.3f} s   "
+            f"加速 {legacy_time / gazetteer_time:6.1f}x   结果不同 {differences} 条（最长匹配优先）"
+        )
+
+
+if __name__ == "__main__":
+    main()
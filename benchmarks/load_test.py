@@ -0,0 +1,79 @@
+"""网页服务压测：按给定并发反复请求首页的常见筛选组合，输出延迟分位数
+
+用法：python benchmarks/load_test.py [--url http://127.0.0.1:5000] [--concurrency 16] [--requests 2000]
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# 首页常见的筛选组合
+QUERIES = [
+    {},
+    {"province": "广东"},
+    {"province": "广东", "city": "深圳"},
+    {"start_date": "2024-01-01", "end_date": "2024-12-31"},
+    {"keyword": "光伏发电"},
+    {"keyword": "储能", "province": "江苏"},
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="首页压测")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="服务地址")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发数")
+    parser.add_argument("--requests", type=int, default=2000, help="请求总数")
+    parser.add_argument("--timeout", type=float, default=30, help="单个请求超时（秒）")
+    args = parser.parse_args()
+
+    urls = [f"{args.url.rstrip('/')}/?{urllib.parse.urlencode(query)}" for query in QUERIES]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def request_once(i):
+        url = urls[i % len(urls)]
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=args.timeout) as response:
+                response.read()
+        except (urllib.error.URLError, OSError) as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(request_once, range(args.requests)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"并发 {args.concurrency}，请求 {args.requests}，失败 {len(errors)}，耗时 {duration:.2f} s")
+    print(f"吞吐量 {len(latencies) / duration:.1f} 请求/秒")
+    if latencies:
+        print(
+            f"延迟 p50 {percentile(latencies, 0.50) * 1000:.1f} ms  "
+            f"p90 {percentile(latencies, 0.90) * 1000:.1f} ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms  "
+            f"平均 {statistics.mean(latencies) * 1000:.1f} ms"
+        )
+    if errors:
+        print(f"首个错误：{errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""用 GUI 实际构造的筛选条件运行批量删除、批量设置省市和关键词替换
+
+用法：python checks/check_bulk_actions.py
+在临时库中执行，检查每个操作只影响筛选结果且返回的条数正确。
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database_manager  # noqa: E402
+
+ARTICLES = [
+    ("广东光伏项目管理办法", "2024-01-05", "广东", "深圳", "光伏, 储能", "摘要", "https://example.com/1"),
+    ("深圳储能补贴政策", "2024-02-10", "广东", "深圳", "储能", "摘要", "https://example.com/2"),
+    ("广州风电规划", "2024-02-20", "广东", "广州", "风电", "摘要", "https://example.com/3"),
+    ("浙江分布式光伏通知", "2024-03-01", "浙江", "杭州", "光伏", "摘要", "https://example.com/4"),
+]
+
+
+# 与 DatabaseManagerApp.apply_filter 相同的键，未填写的条件为空字符串
+def gui_filters(**values):
+    filters = dict.fromkeys(("title", "keywords", "province", "city", "start_date", "end_date"), "")
+    filters.update(values)
+    return filters
+
+
+def build_database(db_name):
+    database_manager.initialize_database(db_name)
+    connection = database_manager.connect(db_name)
+    with connection:
+        connection.executemany(database_manager.INSERT_ARTICLE_SQL, ARTICLES)
+    return connection
+
+
+def check(name, actual, expected):
+    ok = actual == expected
+    print(f"{'OK  ' if ok else 'FAIL'} {name}: {actual!r}" + ("" if ok else f"，期望 {expected!r}"))
+    return ok
+
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        connection = build_database(os.path.join(directory, "bulk.db"))
+
+        filters = gui_filters(province="广东", city="深圳")
+        count = database_manager.set_matching_location(connection, "广东", "珠海", **filters)
+        results.append(check("设置省市条数", count, 2))
+        rows = connection.execute("SELECT url, city FROM articles ORDER BY id").fetchall()
+        results.append(check("设置省市结果", [city for _, city in rows], ["珠海", "珠海", "广州", "杭州"]))
+
+        filters = gui_filters(province="广东", start_date="2024-02-01")
+        count = database_manager.set_matching_location(connection, "", "", **filters)
+        results.append(check("清空省市条数", count, 2))
+
+        filters = gui_filters(keywords="光伏")
+        count = database_manager.replace_matching_keywords(connection, "光伏", "太阳能", **filters)
+        results.append(check("替换关键词条数", count, 2))
+        keywords = [row[0] for row in connection.execute("SELECT keywords FROM articles ORDER BY id")]
+        results.append(check("替换关键词结果", keywords, ["太阳能, 储能", "储能", "风电", "太阳能"]))
+
+        filters = gui_filters(end_date="2024-02-15")
+        count = database_manager.delete_matching_articles(connection, **filters)
+        results.append(check("删除条数", count, 2))
+        remaining = connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        results.append(check("剩余条数", remaining, 2))
+        connection.close()
+
+    failures = results.count(False)
+    print(f"共 {len(results)} 项检查，{failures} 项失败")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
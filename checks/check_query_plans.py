@@ -0,0 +1,120 @@
+"""检查网页和 GUI 生成的筛选查询是否都命中了索引
+
+用法：python checks/check_query_plans.py [数据库路径]
+未指定数据库时生成一个带模拟数据的临时库，执行完毕后删除。
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database_manager  # noqa: E402
+from gazetteer import MAPPING_FILE, load_mapping_rows  # noqa: E402
+
+SAMPLE_FILTERS = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-03-31",
+    "province": "广东",
+    "city": "深圳",
+}
+SAMPLE_CURSOR = ("2024-02-15", 10000)
+SAMPLE_KEYWORDS = ("储能", "光伏发电", "储能 光伏")
+
+
+# 生成模拟文章数据
+def build_sample_database(db_name, size=20000, seed=42):
+    rng = random.Random(seed)
+    rows = load_mapping_rows(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), MAPPING_FILE))
+    database_manager.initialize_database(db_name)
+    connection = database_manager.connect(db_name)
+    first_day = date(2022, 1, 1)
+    with connection:
+        for i in range(size):
+            province, city = rng.choice(rows) if rng.random() < 0.8 else (None, None)
+            day = (first_day + timedelta(days=rng.randrange(1000))).isoformat()
+            connection.execute(
+                database_manager.INSERT_ARTICLE_SQL,
+                (f"政策标题{i}", day, province, city, "光伏, 储能", f"摘要{i}", f"https://example.com/{i}"),
+            )
+    connection.execute("ANALYZE")
+    connection.close()
+
+
+# 网页和 GUI 可能产生的全部筛选组合，包括不带筛选条件的首页
+def filter_combinations():
+    names = list(SAMPLE_FILTERS)
+    for size in range(len(names) + 1):
+        for combination in itertools.combinations(names, size):
+            yield {name: SAMPLE_FILTERS[name] for name in combination}
+
+# 网页首页和 ArticlePageSource 实际发出的分页方式：
+# 首页、(date, id) 游标前后翻页、跳到最后一页的反向查询以及无法定位时的 OFFSET
+PAGING_OPTIONS = {
+    "首页": {"limit": 51},
+    "下一页": {"limit": 51, "after": SAMPLE_CURSOR},
+    "上一页": {"limit": 51, "before": SAMPLE_CURSOR},
+    "升序下一页": {"limit": 50, "ascending": True, "after": SAMPLE_CURSOR},
+    "升序上一页": {"limit": 50, "ascending": True, "before": SAMPLE_CURSOR},
+    "最后一页": {"limit": 37, "ascending": True},
+    "跳页": {"limit": 50, "offset": 500},
+}
+
+# 收集要检查的查询：(说明, SQL, 参数, 是否要求排序由索引完成)
+def collect_queries():
+    queries = []
+    for filters in filter_combinations():
+        if filters:
+            queries.append((str(filters), *database_manager.build_article_query(**filters), False))
+        for name, options in PAGING_OPTIONS.items():
+            query, params = database_manager.build_article_query(**options, **filters)
+            queries.append((f"{name} {filters}", query, params, True))
+        if filters:
+            queries.append((f"计数 {filters}", *database_manager.build_article_count_query(**filters), False))
+    # 检索词：两个汉字走二元索引，3 个字符及以上走 trigram 索引，结果集再排序
+    for keyword in SAMPLE_KEYWORDS:
+        for filters in ({}, {"province": SAMPLE_FILTERS["province"]}):
+            for name, options in (("检索", {}), ("检索首页", {"limit": 51})):
+                query, params = database_manager.build_article_query(keyword=keyword, **options, **filters)
+                queries.append((f"{name} {keyword!r} {filters}", query, params, False))
+    queries.append(("{'order_by': 'date'}", "SELECT * FROM articles ORDER BY date DESC", [], True))
+    return queries
+
+# 使用了索引且没有全表扫描；分页查询还要求不额外排序，否则 LIMIT 前仍需读出全部匹配行
+def plan_ok(plan, ordered):
+    if any(step == "SCAN articles" for step in plan) or not any("INDEX" in step for step in plan):
+        return False
+    return not (ordered and any("TEMP B-TREE" in step for step in plan))
+
+
+def main():
+    temporary = None
+    if len(sys.argv) > 1:
+        db_name = sys.argv[1]
+        database_manager.initialize_database(db_name)
+    else:
+        temporary = tempfile.TemporaryDirectory()
+        db_name = os.path.join(temporary.name, "plans.db")
+        build_sample_database(db_name)
+
+    failures = 0
+    queries = collect_queries()
+    for label, query, params, ordered in queries:
+        plan = database_manager.explain_query_plan(query, params, db_name)
+        ok = plan_ok(plan, ordered)
+        failures += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {label}")
+        for step in plan:
+            print(f"       {step}")
+
+    if temporary:
+        temporary.cleanup()
+    print(f"共 {len(queries)} 个查询，{failures} 个未使用索引或需要额外排序")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
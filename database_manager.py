@@ -1,52 +1,279 @@
+import json
+import os
+import re
 import sqlite3
+import threading
+from urllib.request import pathname2url
 
-# 创建或连接到 SQLite 数据库
-def initialize_database(db_name="news_data.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
+# trigram 分词对中文按字切分，检索词至少需要 3 个字符
+FTS_MIN_TERM_LENGTH = 3
+SEARCH_COLUMNS = ("title", "keywords", "summary")
 
-    # 创建文章数据表，url 列具有唯一约束
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS articles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            date TEXT NOT NULL,
-            province TEXT,
-            city TEXT,
-            keywords TEXT,
-            summary TEXT,
-            url TEXT NOT NULL UNIQUE
+# 连续的汉字片段；两个字的检索词（储能、光伏、风电……）走二元切分的索引 articles_bigram
+CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+BIGRAM_TERM_LENGTH = 2
+
+# 把连续汉字切成相邻两字一组、空格分隔的词，其余文本原样保留，供 unicode61 分词
+def bigram_text(text):
+    if not text:
+        return text
+
+    def split_run(match):
+        run = match.group()
+        return " " + " ".join(run[i:i + 2] for i in range(max(1, len(run) - 1))) + " "
+
+    return CJK_RUN.sub(split_run, text)
+
+# 打开读写连接并注册 bigrams() 函数；articles_bigram 的触发器依赖它，写入文章的连接都要经由这里打开
+def connect(db_name="news_data.db", **kwargs):
+    connection = sqlite3.connect(db_name, **kwargs)
+    connection.create_function("bigrams", 1, bigram_text, deterministic=True)
+    return connection
+
+# 创建 FTS5 全文索引及同步触发器，首次创建时回填已有文章
+def ensure_fts_index(connection):
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    ).fetchone()
+
+    connection.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, keywords, summary,
+            content='articles', content_rowid='id', tokenize='trigram'
         )
     ''')
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts (rowid, title, keywords, summary)
+            VALUES (new.id, new.title, new.keywords, new.summary);
+        END
+    ''')
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, keywords, summary)
+            VALUES ('delete', old.id, old.title, old.keywords, old.summary);
+        END
+    ''')
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, keywords, summary)
+            VALUES ('delete', old.id, old.title, old.keywords, old.summary);
+            INSERT INTO articles_fts (rowid, title, keywords, summary)
+            VALUES (new.id, new.title, new.keywords, new.summary);
+        END
+    ''')
 
-    connection.commit()
-    connection.close()
+    if not exists:
+        connection.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
 
+# 按空格拆分检索词：3 个字符及以上走 trigram 全文索引，两个汉字走二元索引，其余回退到 LIKE
+def build_search_filter(text, columns=SEARCH_COLUMNS):
+    match_terms, clauses, params = [], [], []
+    for term in text.split():
+        if len(term) >= FTS_MIN_TERM_LENGTH:
+            phrase = term.replace('"', '""')
+            match_terms.append(f'{{{" ".join(columns)}}} : "{phrase}"')
+        elif len(term) == BIGRAM_TERM_LENGTH and CJK_RUN.fullmatch(term):
+            clauses.append("articles.id IN (SELECT rowid FROM articles_bigram WHERE articles_bigram MATCH ?)")
+            params.append(f'{{{" ".join(columns)}}} : "{term}"')
+        else:
+            clauses.append("(" + " OR ".join(f"articles.{column} LIKE ?" for column in columns) + ")")
+            params.extend([f"%{term}%"] * len(columns))
+    return match_terms, clauses, params
 
-    connection.commit()
-    connection.close()
+# 构造文章筛选条件，返回 (条件列表, 参数列表, 全文检索表达式)
+def build_article_filter(keyword="", title="", keywords="", start_date="", end_date="", province="", city=""):
+    match_terms, clauses, params = [], [], []
+    for text, columns in ((keyword, SEARCH_COLUMNS), (title, ("title",)), (keywords, ("keywords",))):
+        if text:
+            terms, term_clauses, term_params = build_search_filter(text, columns)
+            match_terms.extend(terms)
+            clauses.extend(term_clauses)
+            params.extend(term_params)
 
-# 插入文章数据
-def insert_article(data, db_name="news_data.db"):
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
+    if start_date:
+        clauses.append("articles.date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("articles.date <= ?")
+        params.append(end_date)
+    if province:
+        clauses.append("articles.province = ?")
+        params.append(province)
+    if city:
+        clauses.append("articles.city = ?")
+        params.append(city)
+    return clauses, params, " AND ".join(match_terms)
+
+ARTICLE_COLUMNS = (
+    "articles.id, articles.title, articles.date, articles.province, articles.city, "
+    "articles.keywords, {summary}, articles.url"
+)
+
+# 构造 FROM/WHERE 部分，返回 (SQL 片段, 参数列表, 是否使用全文检索)
+# after/before 为 (date, id) 键集分页游标，ascending 表示按日期升序翻页
+def build_article_where(after=None, before=None, ascending=False, **filters):
+    clauses, params, match_expression = build_article_filter(**filters)
+    if match_expression:
+        sql = "FROM articles JOIN articles_fts ON articles_fts.rowid = articles.id WHERE articles_fts MATCH ?"
+        params = [match_expression] + params
+    else:
+        sql = "FROM articles WHERE 1=1"
+
+    if after:
+        clauses.append(f"(articles.date, articles.id) {'>' if ascending else '<'} (?, ?)")
+        params.extend(after)
+    if before:
+        clauses.append(f"(articles.date, articles.id) {'<' if ascending else '>'} (?, ?)")
+        params.extend(before)
+
+    for clause in clauses:
+        sql += " AND " + clause
+    return sql, params, bool(match_expression)
 
-    # 保证省市字段仅保留第一条信息
+# 构造文章查询：命中全文索引时以高亮片段代替摘要（snippet=False 时保留完整摘要）
+# ranked 时检索结果按相关度排序；指定 limit 或 order_by_date 时按 (date, id) 排序，默认倒序
+# 使用 before 游标时按相反方向查询，调用方需要把结果翻转回来
+def build_article_query(highlight=("【", "】"), after=None, before=None, limit=None, offset=None,
+                        order_by_date=False, ascending=False, ranked=False, snippet=True, **filters):
+    where, params, full_text = build_article_where(after=after, before=before, ascending=ascending, **filters)
+    if full_text and snippet:
+        summary = "snippet(articles_fts, 2, ?, ?, '…', 32) AS summary"
+        params = [highlight[0], highlight[1]] + params
+    else:
+        summary = "articles.summary"
+    query = f"SELECT {ARTICLE_COLUMNS.format(summary=summary)} {where}"
+
+    if full_text and (ranked or (limit is None and not order_by_date)):
+        query += " ORDER BY bm25(articles_fts, 10.0, 5.0, 1.0)"
+    elif limit is not None or order_by_date:
+        direction = "ASC" if ascending != bool(before) else "DESC"
+        query += f" ORDER BY articles.date {direction}, articles.id {direction}"
+
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+        if offset:
+            query += f" OFFSET {int(offset)}"
+    return query, params
+
+# 构造与 build_article_query 相同筛选条件的计数查询
+def build_article_count_query(**filters):
+    where, params, _ = build_article_where(**filters)
+    return f"SELECT COUNT(*) {where}", params
+
+# 构造符合筛选条件的文章 ID 子查询，供批量修改和删除使用
+def build_matching_ids_query(**filters):
+    where, params, _ = build_article_where(**filters)
+    return f"SELECT articles.id {where}", params
+
+# 删除符合筛选条件的全部文章，单条语句在一个事务内完成，返回删除条数
+def delete_matching_articles(connection, **filters):
+    ids_query, params = build_matching_ids_query(**filters)
+    with connection:
+        cursor = connection.execute(f"DELETE FROM articles WHERE id IN ({ids_query})", params)
+    return cursor.rowcount
+
+# 将符合筛选条件的文章统一设置为指定省市，空字符串表示清空
+# 新省市参数不能叫 province/city，否则会与筛选条件中的同名键冲突
+def set_matching_location(connection, new_province, new_city, **filters):
+    ids_query, params = build_matching_ids_query(**filters)
+    with connection:
+        cursor = connection.execute(
+            f"UPDATE articles SET province = ?, city = ? WHERE id IN ({ids_query})",
+            [new_province or None, new_city or None] + params,
+        )
+    return cursor.rowcount
+
+# 在符合筛选条件的文章关键词中查找替换，只更新包含查找内容的行
+def replace_matching_keywords(connection, old, new, **filters):
+    ids_query, params = build_matching_ids_query(**filters)
+    with connection:
+        cursor = connection.execute(
+            f"UPDATE articles SET keywords = replace(keywords, ?, ?) "
+            f"WHERE instr(keywords, ?) > 0 AND id IN ({ids_query})",
+            [old, new, old] + params,
+        )
+    return cursor.rowcount
+
+INSERT_ARTICLE_SQL = '''
+    INSERT OR IGNORE INTO articles (title, date, province, city, keywords, summary, url)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+# 保证省市字段仅保留第一条信息
+def normalize_article(data):
     province_text, city_text = data[2], data[3]  # 省市字段是 data[2] 和 data[3]
     if province_text:
         province_text = province_text.split(",")[0].strip()  # 仅保留第一个省
     if city_text:
         city_text = city_text.split(",")[0].strip()  # 仅保留第一个市
+    return (data[0], data[1], province_text, city_text, data[4], data[5], data[6])
+
+# 插入文章数据
+def insert_article(data, db_name="news_data.db"):
+    connection = connect(db_name)
+    cursor = connection.cursor()
 
     # 插入数据
-    cursor.execute('''
-        INSERT OR IGNORE INTO articles (title, date, province, city, keywords, summary, url)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (data[0], data[1], province_text, city_text, data[4], data[5], data[6]))
+    cursor.execute(INSERT_ARTICLE_SQL, normalize_article(data))
 
     connection.commit()
     connection.close()
 
+# 读取已入库文章的链接集合，用于抓取详情页前去重
+def load_known_urls(db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    known_urls = {row[0] for row in connection.execute('SELECT url FROM articles')}
+    connection.close()
+    return known_urls
+
+class ArticleWriter:
+    """长连接的批量文章写入器，缓冲后按批次在单个事务中提交"""
+
+    def __init__(self, db_name="news_data.db", batch_size=50, known_urls=None, before_commit=None):
+        self.connection = connect(db_name)
+        # WAL 模式下读写互不阻塞，NORMAL 同步级别只在检查点时 fsync
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.batch_size = batch_size
+        self.buffer = []
+        self.inserted = 0  # 实际写入的条数
+        self.ignored = 0  # 因 url 重复被忽略的条数
+        # 已入库的链接，随写入同步更新；可传入调用方已读取的集合共用
+        self.known_urls = load_known_urls(db_name) if known_urls is None else known_urls
+        # before_commit(connection, rows) 在同一事务内执行，例如保存爬取进度
+        self.before_commit = before_commit
+
+    def add(self, data):
+        self.buffer.append(normalize_article(data))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """将缓冲区中的文章在一个事务内写入数据库"""
+        if not self.buffer:
+            return 0
+        # rowcount 不包含全文索引触发器产生的写入，只统计实际插入的文章
+        with self.connection:
+            inserted = self.connection.executemany(INSERT_ARTICLE_SQL, self.buffer).rowcount
+            if self.before_commit:
+                self.before_commit(self.connection, self.buffer)
+        self.known_urls.update(row[6] for row in self.buffer)
+        self.inserted += inserted
+        self.ignored += len(self.buffer) - inserted
+        self.buffer = []
+        return inserted
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 # 查询所有文章，支持排序
 def query_all_articles(order_by=None, ascending=True, db_name="news_data.db"):
     connection = sqlite3.connect(db_name)
@@ -62,3 +289,302 @@ def query_all_articles(order_by=None, ascending=True, db_name="news_data.db"):
 
     connection.close()
     return articles
+
+# 创建爬取状态表，记录每个来源的高水位线
+def ensure_crawl_state_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            source TEXT PRIMARY KEY,
+            last_date TEXT NOT NULL,
+            last_url TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+# 读取来源的高水位线，返回 (日期, 链接) 或 None
+def get_high_water_mark(source, db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    ensure_crawl_state_table(connection)
+    row = connection.execute(
+        'SELECT last_date, last_url FROM crawl_state WHERE source = ?', (source,)
+    ).fetchone()
+    connection.close()
+    return row
+
+# 更新来源的高水位线
+def set_high_water_mark(source, last_date, last_url, db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    ensure_crawl_state_table(connection)
+    with connection:
+        connection.execute('''
+            INSERT INTO crawl_state (source, last_date, last_url, updated_at)
+            VALUES (?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(source) DO UPDATE SET
+                last_date = excluded.last_date,
+                last_url = excluded.last_url,
+                updated_at = excluded.updated_at
+        ''', (source, last_date, last_url))
+    connection.close()
+
+# 创建失败记录表（死信列表），记录重试用尽仍未抓取成功的链接
+def create_crawl_failures_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_failures (
+            url TEXT PRIMARY KEY,
+            stage TEXT NOT NULL,
+            error TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            failed_at TEXT NOT NULL
+        )
+    ''')
+
+# 写入本次失败的链接，并清除之后已成功入库的链接
+# 指定 run_id 时在同一事务中清空该运行检查点里的失败列表，续爬时不会重复计入次数
+def record_crawl_failures(failures, db_name="news_data.db", run_id=None):
+    connection = sqlite3.connect(db_name)
+    with connection:
+        connection.executemany('''
+            INSERT INTO crawl_failures (url, stage, error, failed_at)
+            VALUES (?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT(url) DO UPDATE SET
+                stage = excluded.stage,
+                error = excluded.error,
+                attempts = attempts + 1,
+                failed_at = excluded.failed_at
+        ''', failures)
+        connection.execute('DELETE FROM crawl_failures WHERE url IN (SELECT url FROM articles)')
+        if run_id is not None:
+            connection.execute("UPDATE crawl_runs SET failures = '[]' WHERE id = ?", (run_id,))
+    connection.close()
+
+# 读取失败记录，返回 (链接, 阶段, 错误, 次数, 时间) 列表
+def load_crawl_failures(db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    rows = connection.execute(
+        'SELECT url, stage, error, attempts, failed_at FROM crawl_failures ORDER BY failed_at DESC'
+    ).fetchall()
+    connection.close()
+    return rows
+
+# 创建爬取运行记录表，保存日期范围、翻页进度、待处理链接和失败链接，供中断后续爬
+def create_crawl_runs_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            high_water_date TEXT,
+            high_water_url TEXT,
+            status TEXT NOT NULL DEFAULT 'running',
+            last_page INTEGER NOT NULL DEFAULT 0,
+            discovery_done INTEGER NOT NULL DEFAULT 0,
+            newest_date TEXT,
+            newest_url TEXT,
+            pending TEXT NOT NULL DEFAULT '[]',
+            failures TEXT NOT NULL DEFAULT '[]',
+            started_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_crawl_runs_name_status ON crawl_runs (name, status)')
+
+# 登记一次新的爬取，返回运行 ID
+def start_crawl_run(name, start_date, end_date, high_water_mark=None, db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    with connection:
+        cursor = connection.execute('''
+            INSERT INTO crawl_runs (name, start_date, end_date, high_water_date, high_water_url, started_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, datetime('now', 'localtime'), datetime('now', 'localtime'))
+        ''', (name, start_date, end_date, *(high_water_mark or (None, None))))
+    connection.close()
+    return cursor.lastrowid
+
+# 保存爬取进度；由调用方在写入文章的同一事务中调用，进度与已入库文章始终一致
+def save_crawl_checkpoint(connection, run_id, last_page, discovery_done, newest_seen, pending, failures):
+    newest_date, newest_url = newest_seen or (None, None)
+    connection.execute('''
+        UPDATE crawl_runs
+        SET last_page = ?, discovery_done = ?, newest_date = ?, newest_url = ?, pending = ?, failures = ?,
+            updated_at = datetime('now', 'localtime')
+        WHERE id = ?
+    ''', (last_page, int(discovery_done), newest_date, newest_url,
+          json.dumps(pending, ensure_ascii=False), json.dumps(failures, ensure_ascii=False), run_id))
+
+# 标记爬取结束：completed 或 stopped（stopped 可以续爬）
+def finish_crawl_run(run_id, status, db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    with connection:
+        connection.execute(
+            "UPDATE crawl_runs SET status = ?, updated_at = datetime('now', 'localtime') WHERE id = ?",
+            (status, run_id),
+        )
+    connection.close()
+
+# 读取该爬虫最近一次未完成的运行，返回字典或 None
+def load_resumable_run(name, db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    connection.row_factory = sqlite3.Row
+    row = connection.execute(
+        "SELECT * FROM crawl_runs WHERE name = ? AND status IN ('running', 'stopped') ORDER BY id DESC LIMIT 1",
+        (name,),
+    ).fetchone()
+    connection.close()
+    if row is None:
+        return None
+    run = dict(row)
+    run["pending"] = json.loads(run["pending"])
+    run["failures"] = json.loads(run["failures"])
+    return run
+
+# 爬取完成后推进高水位线：只能向后移动，且本次范围须从现有高水位线当天或更早开始，
+# 否则两者之间的日期尚未爬取，提前推进会让定时任务跳过它们
+def advance_high_water_mark(source, start_date, newest_seen, db_name="news_data.db"):
+    if not newest_seen:
+        return False
+    current = get_high_water_mark(source, db_name)
+    if current is not None and (start_date > current[0] or newest_seen[0] < current[0]):
+        return False
+    set_high_water_mark(source, *newest_seen, db_name=db_name)
+    return True
+
+# 创建文章数据表，url 列具有唯一约束
+def create_articles_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            province TEXT,
+            city TEXT,
+            keywords TEXT,
+            summary TEXT,
+            url TEXT NOT NULL UNIQUE
+        )
+    ''')
+    ensure_crawl_state_table(connection)
+
+# 为日期和省市筛选建立索引，并更新查询优化器的统计信息
+def create_filter_indexes(connection):
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_articles_province_city_date ON articles (province, city, date)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_articles_province_date ON articles (province, date)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_articles_city_date ON articles (city, date)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_articles_date ON articles (date)')
+    connection.execute('ANALYZE')
+
+# 只在索引列变化时同步全文索引，批量修改省市时不再重写 FTS 数据
+def narrow_fts_update_trigger(connection):
+    connection.execute('DROP TRIGGER IF EXISTS articles_fts_update')
+    connection.execute('''
+        CREATE TRIGGER articles_fts_update AFTER UPDATE OF title, keywords, summary ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, keywords, summary)
+            VALUES ('delete', old.id, old.title, old.keywords, old.summary);
+            INSERT INTO articles_fts (rowid, title, keywords, summary)
+            VALUES (new.id, new.title, new.keywords, new.summary);
+        END
+    ''')
+
+# 两字检索词的索引：文本经 bigrams() 切分后存入无内容的 unicode61 FTS5 表，只保存倒排索引
+def create_bigram_index(connection):
+    connection.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_bigram USING fts5(
+            title, keywords, summary, content='', tokenize='unicode61'
+        )
+    ''')
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bigram_insert AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_bigram (rowid, title, keywords, summary)
+            VALUES (new.id, bigrams(new.title), bigrams(new.keywords), bigrams(new.summary));
+        END
+    ''')
+    # 无内容表删除时需要提供与写入时相同的值
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bigram_delete AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_bigram (articles_bigram, rowid, title, keywords, summary)
+            VALUES ('delete', old.id, bigrams(old.title), bigrams(old.keywords), bigrams(old.summary));
+        END
+    ''')
+    connection.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_bigram_update AFTER UPDATE OF title, keywords, summary ON articles BEGIN
+            INSERT INTO articles_bigram (articles_bigram, rowid, title, keywords, summary)
+            VALUES ('delete', old.id, bigrams(old.title), bigrams(old.keywords), bigrams(old.summary));
+            INSERT INTO articles_bigram (rowid, title, keywords, summary)
+            VALUES (new.id, bigrams(new.title), bigrams(new.keywords), bigrams(new.summary));
+        END
+    ''')
+    connection.execute('''
+        INSERT INTO articles_bigram (rowid, title, keywords, summary)
+        SELECT id, bigrams(title), bigrams(keywords), bigrams(summary) FROM articles
+    ''')
+
+# 数据库结构迁移，按顺序执行，已执行到的版本记录在 PRAGMA user_version 中
+MIGRATIONS = [
+    create_articles_table,
+    ensure_fts_index,
+    create_filter_indexes,
+    narrow_fts_update_trigger,
+    create_crawl_failures_table,
+    create_crawl_runs_table,
+    create_bigram_index,
+]
+
+# 创建或连接到 SQLite 数据库，并执行尚未应用的迁移
+def initialize_database(db_name="news_data.db"):
+    connection = connect(db_name, isolation_level=None)
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+
+    for target_version, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        # 每个迁移和版本号在同一个事务中提交
+        connection.execute('BEGIN')
+        try:
+            migration(connection)
+            connection.execute(f'PRAGMA user_version = {target_version}')
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    # WAL 模式持久保存在数据库文件中，只读连接和写入连接可以并发
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.close()
+
+class ReadOnlyConnectionPool:
+    """按线程复用的只读连接，供网页服务的各个工作线程使用"""
+
+    def __init__(self, db_name="news_data.db", mmap_size=256 * 1024 * 1024, cache_size=-64 * 1024):
+        self.db_name = db_name
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size  # 负数表示以 KiB 为单位
+        self.local = threading.local()
+
+    def connect(self):
+        uri = f"file:{pathname2url(os.path.abspath(self.db_name))}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True)
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        connection.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        return connection
+
+    def get(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.connect()
+            self.local.connection = connection
+        return connection
+
+read_pools = {}
+read_pools_lock = threading.Lock()
+
+# 获取当前线程的只读连接，连接在线程内复用，不需要关闭
+def get_read_connection(db_name="news_data.db"):
+    pool = read_pools.get(db_name)
+    if pool is None:
+        with read_pools_lock:
+            pool = read_pools.setdefault(db_name, ReadOnlyConnectionPool(db_name))
+    return pool.get()
+
+# 查看查询计划，返回 EXPLAIN QUERY PLAN 的描述列表
+def explain_query_plan(query, params=(), db_name="news_data.db"):
+    connection = sqlite3.connect(db_name)
+    plan = [row[-1] for row in connection.execute('EXPLAIN QUERY PLAN ' + query, params)]
+    connection.close()
+    return plan
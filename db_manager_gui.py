@@ -1,48 +1,328 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import csv
+import os
 import sqlite3
-import pandas as pd
+import queue
+import threading
+from collections import OrderedDict
+from gazetteer import load_mapping_rows
+import database_manager
 
 # 数据库文件路径
 db_path = "news_data.db"
 PAGE_SIZE = 50  # 每页显示的数据条数
+EXPORT_CHUNK_SIZE = 1000  # 导出时每次从游标读取的行数
+EXCEL_MAX_ROWS = 1048576  # 单个工作表的最大行数（含表头）
 
 # 读取省份和城市映射
 def load_province_city_mapping():
     try:
-        df = pd.read_csv('province_city_mapping.csv')
-        provinces = df['province'].unique().tolist()
-        city_mapping = df.groupby('province')['city'].apply(list).to_dict()
-        return provinces, city_mapping
+        city_mapping = {}
+        for province, city in load_mapping_rows('province_city_mapping.csv'):
+            city_mapping.setdefault(province, []).append(city)
+        return list(city_mapping), city_mapping
     except Exception as e:
         messagebox.showerror("错误", f"加载省份城市映射失败：{e}")
         return [], {}
 
 # 数据库操作函数
 def connect_db():
-    return sqlite3.connect(db_path)
-
-def fetch_data(query):
-    connection = connect_db()
-    try:
-        df = pd.read_sql_query(query, connection)
-        return df
-    except Exception as e:
-        messagebox.showerror("错误", f"查询失败：{e}")
-    finally:
-        connection.close()
-
-def update_record(query):
-    connection = connect_db()
+    return database_manager.connect(db_path)
+
+# 逐块读取查询结果，返回列名和数据块生成器
+def iter_query_chunks(connection, query, params=()):
+    cursor = connection.execute(query, params)
+    columns = [description[0] for description in cursor.description]
+
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    return columns, chunks()
+
+def write_csv_export(file, columns, chunks, progress):
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    written = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        written += len(rows)
+        progress(written)
+    return written
+
+# openpyxl 只写模式逐行写入临时文件，不在内存中保留整个工作簿
+def write_xlsx_export(file, columns, chunks, progress):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, written = None, EXCEL_MAX_ROWS, 0
+    for rows in chunks:
+        for row in rows:
+            if sheet_rows >= EXCEL_MAX_ROWS:  # 超出单表行数上限时续写到新工作表
+                sheet = workbook.create_sheet(f"articles_{len(workbook.worksheets) + 1}")
+                sheet.append(columns)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        written += len(rows)
+        progress(written)
+    if sheet is None:
+        workbook.create_sheet("articles_1").append(columns)
+    workbook.save(file)
+    return written
+
+# 按当前筛选条件导出，先写入临时文件，完成后再替换目标文件
+def export_articles(connection, filters, ascending, file_path, progress):
+    count_query, count_params = database_manager.build_article_count_query(**filters)
+    total = connection.execute(count_query, count_params).fetchone()[0]
+    query, params = database_manager.build_article_query(
+        order_by_date=True, ascending=ascending, snippet=False, **filters
+    )
+    columns, chunks = iter_query_chunks(connection, query, params)
+
+    temp_path = file_path + ".part"
     try:
-        cursor = connection.cursor()
-        cursor.execute(query)
-        connection.commit()
-        messagebox.showinfo("成功", "记录更新成功！")
-    except Exception as e:
-        messagebox.showerror("错误", f"更新失败：{e}")
-    finally:
-        connection.close()
+        if file_path.lower().endswith(".csv"):
+            with open(temp_path, "w", newline="", encoding="utf-8-sig") as f:
+                written = write_csv_export(f, columns, chunks, lambda n: progress(n, total))
+        else:
+            written = write_xlsx_export(temp_path, columns, chunks, lambda n: progress(n, total))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        chunks.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+# 在后台线程中执行写操作，返回受影响的行数
+def execute_update(connection, query, params=()):
+    cursor = connection.execute(query, params)
+    connection.commit()
+    return cursor.rowcount
+
+# 保存单条记录的修改，返回修改后的整行数据
+def save_article(connection, record_id, values):
+    with connection:
+        connection.execute(
+            """
+            UPDATE articles
+            SET title = ?, date = ?, province = ?, city = ?, keywords = ?, summary = ?, url = ?
+            WHERE id = ?
+            """,
+            list(values) + [record_id],
+        )
+    return connection.execute(
+        f"SELECT {database_manager.ARTICLE_COLUMNS.format(summary='articles.summary')} FROM articles WHERE id = ?",
+        (record_id,),
+    ).fetchone()
+
+class BackgroundJob:
+    """一次后台数据库操作，可通过 interrupt() 中止正在执行的语句"""
+
+    def __init__(self, work, on_done, on_error, supersede):
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.supersede = supersede
+        self.cancelled = threading.Event()
+        self.connection = None
+
+    def cancel(self):
+        self.cancelled.set()
+        connection = self.connection
+        if connection is not None:
+            try:
+                connection.interrupt()
+            except sqlite3.ProgrammingError:
+                pass  # 连接已关闭，语句已结束
+
+class DatabaseWorker:
+    """在后台线程执行数据库操作，结果通过 root.after 交回 Tk 主线程"""
+
+    POLL_INTERVAL = 50  # 毫秒
+    PROGRESS_STEPS = 1000  # 每执行多少条虚拟机指令检查一次取消标记
+
+    def __init__(self, root, on_busy):
+        self.root = root
+        self.on_busy = on_busy
+        self.results = queue.Queue()
+        self.active = set()
+        self.root.after(self.POLL_INTERVAL, self.poll)
+
+    def submit(self, work, on_done=None, on_error=None, supersede=True):
+        """work(connection) 在后台线程运行；查询类任务会取代仍在执行的旧查询"""
+        if supersede:
+            for job in [job for job in self.active if job.supersede]:
+                job.cancel()
+                self.active.discard(job)
+
+        job = BackgroundJob(work, on_done, on_error, supersede)
+        self.active.add(job)
+        self.on_busy(True)
+        threading.Thread(target=self.run, args=(job,), daemon=True).start()
+
+    def run(self, job):
+        try:
+            connection = connect_db()
+        except sqlite3.Error as e:
+            self.results.put((job, False, e))
+            return
+        # 取消标记在语句开始前就已设置时，由进度回调中止
+        connection.set_progress_handler(job.cancelled.is_set, self.PROGRESS_STEPS)
+        job.connection = connection
+        try:
+            self.results.put((job, True, job.work(connection)))
+        except Exception as e:
+            self.results.put((job, False, e))
+        finally:
+            job.connection = None
+            connection.close()
+
+    def post(self, callback, *args):
+        """从后台线程安排 callback 在主线程执行"""
+        self.results.put((None, callback, args))
+
+    def cancel(self):
+        """取消所有正在执行的任务"""
+        for job in self.active:
+            job.cancel()
+
+    def poll(self):
+        try:
+            while True:
+                try:
+                    item = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                # 单个回调出错只报告，不影响后续结果的处理
+                try:
+                    self.dispatch(*item)
+                except Exception as e:
+                    self.on_busy(bool(self.active), f"处理结果出错：{e}")
+                    messagebox.showerror("错误", f"处理结果出错：{e}")
+        finally:
+            # 无论如何都要继续轮询，否则之后的结果再也不会被处理
+            self.root.after(self.POLL_INTERVAL, self.poll)
+
+    def dispatch(self, job, succeeded, value):
+        if job is None:
+            succeeded(*value)  # post() 投递的回调
+            return
+        if job not in self.active:
+            return  # 已被新的查询取代，丢弃结果
+        self.active.discard(job)
+        if job.cancelled.is_set():
+            self.on_busy(bool(self.active), "操作已取消")
+        elif succeeded:
+            self.on_busy(bool(self.active))
+            if job.on_done:
+                job.on_done(value)
+        else:
+            self.on_busy(bool(self.active), f"操作失败：{value}")
+            if job.on_error:
+                job.on_error(value)
+
+# 分页数据源
+class ArticlePageSource:
+    """按页从数据库读取文章，只查询可见的一页，排序交给 SQL"""
+
+    MAX_CACHED_PAGES = 8
+
+    def __init__(self, filters=None, order="date_desc", page_size=PAGE_SIZE):
+        self.filters = filters or {}
+        self.order = order  # relevance / date_desc / date_asc
+        self.page_size = page_size
+        self.pages = OrderedDict()  # 页码 -> 数据行，按最近使用排序
+        self.total = None
+        self.lock = threading.RLock()  # 被取代的后台查询可能仍在运行
+
+    def count(self, connection):
+        """筛选结果总数，查询一次后缓存"""
+        with self.lock:
+            if self.total is None:
+                query, params = database_manager.build_article_count_query(**self.filters)
+                self.total = connection.execute(query, params).fetchone()[0]
+            return self.total
+
+    def page_count(self, connection):
+        return max(1, (self.count(connection) + self.page_size - 1) // self.page_size)
+
+    @staticmethod
+    def row_key(row):
+        return row[2], row[0]
+
+    def fetch_page(self, connection, page):
+        """优先用相邻页的 (date, id) 键集定位，无法定位时才使用 OFFSET"""
+        ascending = self.order == "date_asc"
+        options = {"ascending": ascending, "ranked": self.order == "relevance", "limit": self.page_size}
+        reverse = False
+        previous_rows, next_rows = self.pages.get(page - 1), self.pages.get(page + 1)
+
+        if self.order == "relevance" or page == 0:
+            options["offset"] = page * self.page_size
+        elif previous_rows:
+            options["after"] = self.row_key(previous_rows[-1])
+        elif next_rows:
+            options["before"] = self.row_key(next_rows[0])
+            reverse = True
+        elif page == self.page_count(connection) - 1:
+            # 直接跳到最后一页：反向查询剩余的条数
+            options["ascending"] = not ascending
+            options["limit"] = self.count(connection) - page * self.page_size
+            reverse = True
+        else:
+            options["offset"] = page * self.page_size
+
+        query, params = database_manager.build_article_query(**options, **self.filters)
+        rows = connection.execute(query, params).fetchall()
+        if reverse:
+            rows.reverse()
+        return rows
+
+    def get_page(self, connection, page):
+        with self.lock:
+            rows = self.pages.get(page)
+            if rows is None:
+                rows = self.fetch_page(connection, page)
+                self.pages[page] = rows
+                while len(self.pages) > self.MAX_CACHED_PAGES:
+                    self.pages.popitem(last=False)
+            else:
+                self.pages.move_to_end(page)
+            return rows
+
+    def load(self, connection, page):
+        """读取一页，返回 (实际页码, 数据行, 总页数, 总条数)"""
+        total_pages = self.page_count(connection)
+        page = min(page, total_pages - 1)
+        return page, self.get_page(connection, page), total_pages, self.count(connection)
+
+    def prefetch(self, connection, page):
+        """预取相邻的页，翻页时直接命中缓存"""
+        for neighbour in (page + 1, page - 1):
+            if 0 <= neighbour < self.page_count(connection) and neighbour not in self.pages:
+                self.get_page(connection, neighbour)
+
+    def replace_row(self, row):
+        """用修改后的数据替换缓存页中的同一条记录"""
+        with self.lock:
+            for rows in self.pages.values():
+                for i, cached in enumerate(rows):
+                    if cached[0] == row[0]:
+                        rows[i] = row
+
+    def invalidate(self):
+        with self.lock:
+            self.pages.clear()
+            self.total = None
 
 # GUI 界面
 class DatabaseManagerApp:
@@ -50,7 +330,11 @@ class DatabaseManagerApp:
         self.root = root
         self.root.title("SQLite 数据库管理")
         self.current_page = 0  # 当前页码
-        self.sort_order_date = True
+        self.sort_ascending = False  # 默认按日期倒序
+        self.filters = {}
+        self.source = ArticlePageSource()
+        self.total_pages = 1
+        self.worker = DatabaseWorker(root, self.set_busy)
 
         # 读取省份和城市映射
         self.provinces, self.city_mapping = load_province_city_mapping()
@@ -69,7 +353,6 @@ class DatabaseManagerApp:
         self.create_pagination_frame()
 
         # 初始化数据
-        self.all_data = pd.DataFrame()
         self.query_all_data()
 
     def create_filter_frame(self):
@@ -166,6 +449,28 @@ class DatabaseManagerApp:
         self.delete_all_button = tk.Button(pagination_frame, text="删除全部", command=self.delete_all_records)
         self.delete_all_button.pack(side=tk.LEFT, padx=5)
 
+        # 批量操作作用于当前筛选结果的全部记录，而不只是当前页
+        tk.Button(pagination_frame, text="删除筛选结果", command=self.delete_matching).pack(side=tk.LEFT, padx=5)
+        tk.Button(pagination_frame, text="批量设置省市", command=self.set_matching_location).pack(side=tk.LEFT, padx=5)
+        tk.Button(pagination_frame, text="替换关键词", command=self.replace_matching_keywords).pack(side=tk.LEFT, padx=5)
+
+        self.cancel_button = tk.Button(pagination_frame, text="取消", command=self.worker.cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+
+        self.progress = ttk.Progressbar(pagination_frame, mode="indeterminate", length=120)
+        self.progress.pack(side=tk.RIGHT, padx=5)
+
+    def set_busy(self, busy, message=""):
+        """后台任务开始或结束时更新进度条和状态栏"""
+        if busy:
+            self.progress.start(10)
+            self.cancel_button["state"] = tk.NORMAL
+            self.status_label["text"] = message or "正在执行…"
+        else:
+            self.progress.stop()
+            self.cancel_button["state"] = tk.DISABLED
+            self.status_label["text"] = message
+
     def update_city_combobox(self, event):
         """根据选择的省份更新城市下拉列表"""
         province = self.province_var.get()
@@ -176,38 +481,25 @@ class DatabaseManagerApp:
 
     def query_all_data(self):
         """查询所有数据"""
-        self.all_data = fetch_data("SELECT * FROM articles")
-        self.current_page = 0
-        self.update_table()
+        self.filters = {}
+        self.load_source()
 
     def apply_filter(self):
-        """应用筛选条件"""
-        filters = []
-        title_condition = self.title_var.get().strip()
-        keywords_condition = self.keywords_var.get().strip()
-        province_condition = self.province_var.get().strip()
-        city_condition = self.city_var.get().strip()
-        start_date = self.start_date_var.get().strip()
-        end_date = self.end_date_var.get().strip()
-
-        if title_condition:
-            filters.append(f"title LIKE '%{title_condition}%'")
-        if keywords_condition:
-            filters.append(f"keywords LIKE '%{keywords_condition}%'")
-        if province_condition:
-            filters.append(f"province = '{province_condition}'")
-        if city_condition:
-            filters.append(f"city = '{city_condition}'")
-        if start_date:
-            filters.append(f"date >= '{start_date}'")
-        if end_date:
-            filters.append(f"date <= '{end_date}'")
-
-        query = "SELECT * FROM articles"
-        if filters:
-            query += " WHERE " + " AND ".join(filters)
-
-        self.all_data = fetch_data(query)
+        """应用筛选条件，标题和关键词通过全文索引检索并按相关度排序"""
+        self.filters = {
+            "title": self.title_var.get().strip(),
+            "keywords": self.keywords_var.get().strip(),
+            "province": self.province_var.get().strip(),
+            "city": self.city_var.get().strip(),
+            "start_date": self.start_date_var.get().strip(),
+            "end_date": self.end_date_var.get().strip(),
+        }
+        self.load_source(ranked=bool(self.filters["title"] or self.filters["keywords"]))
+
+    def load_source(self, ranked=False):
+        """按当前筛选条件和排序方式建立分页数据源并显示第一页"""
+        order = "relevance" if ranked else ("date_asc" if self.sort_ascending else "date_desc")
+        self.source = ArticlePageSource(self.filters, order)
         self.current_page = 0
         self.update_table()
 
@@ -222,29 +514,43 @@ class DatabaseManagerApp:
         self.query_all_data()
 
     def update_table(self):
-        """更新表格显示"""
+        """在后台读取当前页，完成后刷新表格"""
+        source, page = self.source, self.current_page
+        self.worker.submit(
+            lambda connection: source.load(connection, page),
+            on_done=lambda result: self.show_page(source, *result),
+            on_error=lambda e: messagebox.showerror("错误", f"查询失败：{e}"),
+        )
+
+    def show_page(self, source, page, page_rows, total_pages, total):
+        """显示后台读取到的一页数据"""
+        if source is not self.source:
+            return
         for row in self.tree.get_children():
             self.tree.delete(row)
 
-        start_idx = self.current_page * PAGE_SIZE
-        end_idx = start_idx + PAGE_SIZE
-        page_data = self.all_data.iloc[start_idx:end_idx]
+        for row in page_rows:
+            self.tree.insert("", tk.END, values=row)
 
-        for _, row in page_data.iterrows():
-            self.tree.insert("", tk.END, values=row.tolist())
+        self.current_page, self.total_pages = page, total_pages
+        self.page_label["text"] = f"第 {page + 1} 页 / 共 {total_pages} 页（{total} 条）"
 
-        total_pages = max(1, (len(self.all_data) + PAGE_SIZE - 1) // PAGE_SIZE)
-        self.page_label["text"] = f"第 {self.current_page + 1} 页 / 共 {total_pages} 页"
+        self.prev_button["state"] = tk.NORMAL if page > 0 else tk.DISABLED
+        self.next_button["state"] = tk.NORMAL if page + 1 < total_pages else tk.DISABLED
 
-        self.prev_button["state"] = tk.NORMAL if self.current_page > 0 else tk.DISABLED
-        self.next_button["state"] = tk.NORMAL if end_idx < len(self.all_data) else tk.DISABLED
+        # 后台预取相邻页，翻页或新的查询会取代它
+        self.worker.submit(lambda connection: source.prefetch(connection, page))
 
-    def sort_by_date(self):
-        """按日期排序"""
-        self.sort_order_date = not self.sort_order_date
-        self.all_data = self.all_data.sort_values(by="Date", ascending=self.sort_order_date)
+    def refresh(self):
+        """数据修改后清空缓存并重新读取当前页"""
+        self.source.invalidate()
         self.update_table()
 
+    def sort_by_date(self):
+        """按日期排序，排序在 SQL 中完成"""
+        self.sort_ascending = not self.sort_ascending
+        self.load_source()
+
     def prev_page(self):
         """上一页"""
         if self.current_page > 0:
@@ -253,7 +559,7 @@ class DatabaseManagerApp:
 
     def next_page(self):
         """下一页"""
-        if (self.current_page + 1) * PAGE_SIZE < len(self.all_data):
+        if self.current_page + 1 < self.total_pages:
             self.current_page += 1
             self.update_table()
 
@@ -264,10 +570,70 @@ class DatabaseManagerApp:
 
     def last_page(self):
         """最后一页"""
-        total_pages = max(1, (len(self.all_data) + PAGE_SIZE - 1) // PAGE_SIZE)
-        self.current_page = total_pages - 1
+        self.current_page = self.total_pages - 1
         self.update_table()
 
+    def run_update(self, query, params=()):
+        """在后台执行写操作，成功后刷新当前页"""
+        self.run_bulk(lambda connection: execute_update(connection, query, params))
+
+    def run_bulk(self, work):
+        """在后台执行返回受影响行数的写操作，成功后刷新当前页"""
+        def on_done(rowcount):
+            messagebox.showinfo("成功", f"记录更新成功！（{rowcount} 条）")
+            self.refresh()
+
+        self.worker.submit(
+            work,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("错误", f"更新失败：{e}"),
+            supersede=False,
+        )
+
+    def matching_description(self):
+        """当前筛选结果的描述，用于批量操作前确认"""
+        total = self.source.total
+        scope = "全部记录" if not any(self.source.filters.values()) else "当前筛选结果"
+        return f"{scope}（{total} 条）" if total is not None else scope
+
+    def delete_matching(self):
+        """删除当前筛选结果的全部记录"""
+        if not messagebox.askyesno("确认", f"确定要删除{self.matching_description()}吗？此操作不可撤销！"):
+            return
+        filters = dict(self.source.filters)
+        self.run_bulk(lambda connection: database_manager.delete_matching_articles(connection, **filters))
+
+    def set_matching_location(self):
+        """将当前筛选结果的省市统一修改"""
+        province = simpledialog.askstring("批量设置省市", "省份（留空表示清空）：", parent=self.root)
+        if province is None:
+            return
+        city = simpledialog.askstring("批量设置省市", "城市（留空表示清空）：", parent=self.root)
+        if city is None:
+            return
+        province, city = province.strip(), city.strip()
+        if not messagebox.askyesno("确认", f"将{self.matching_description()}设置为 {province or '空'} / {city or '空'}？"):
+            return
+        filters = dict(self.source.filters)
+        self.run_bulk(
+            lambda connection: database_manager.set_matching_location(connection, province, city, **filters)
+        )
+
+    def replace_matching_keywords(self):
+        """在当前筛选结果的关键词中查找替换"""
+        old = simpledialog.askstring("替换关键词", "查找内容：", parent=self.root)
+        if not old:
+            return
+        new = simpledialog.askstring("替换关键词", "替换为：", parent=self.root)
+        if new is None:
+            return
+        if not messagebox.askyesno("确认", f"在{self.matching_description()}的关键词中将“{old}”替换为“{new}”？"):
+            return
+        filters = dict(self.source.filters)
+        self.run_bulk(
+            lambda connection: database_manager.replace_matching_keywords(connection, old, new, **filters)
+        )
+
     def delete_record(self):
         """删除选中记录"""
         selected_items = self.tree.selection()
@@ -283,10 +649,8 @@ class DatabaseManagerApp:
         if not messagebox.askyesno("确认", f"确定要删除 {len(record_ids)} 条记录吗？"):
             return
 
-        id_list = ", ".join(map(str, record_ids))
-        delete_query = f"DELETE FROM articles WHERE id IN ({id_list})"
-        update_record(delete_query)
-        self.query_all_data()
+        placeholders = ", ".join("?" * len(record_ids))
+        self.run_update(f"DELETE FROM articles WHERE id IN ({placeholders})", [int(record_id) for record_id in record_ids])
 
     def delete_all_records(self):
         """删除全部记录"""
@@ -294,19 +658,33 @@ class DatabaseManagerApp:
             return
 
         delete_query = "DELETE FROM articles"
-        update_record(delete_query)
-        self.query_all_data()
+        self.run_update(delete_query)
 
     def export_to_excel(self):
-        """导出到 Excel"""
-        if self.all_data.empty:
+        """在后台按当前筛选条件分块导出到 Excel 或 CSV"""
+        if not self.tree.get_children():
             messagebox.showwarning("警告", "没有可导出的数据")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel 文件", "*.xlsx")])
-        if file_path:
-            self.all_data.to_excel(file_path, index=False)
-            messagebox.showinfo("成功", f"数据已成功导出到 {file_path}")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx", filetypes=[("Excel 文件", "*.xlsx"), ("CSV 文件（适合大量数据）", "*.csv")]
+        )
+        if not file_path:
+            return
+
+        filters, ascending = dict(self.filters), self.sort_ascending
+        progress = lambda written, total: self.worker.post(self.show_export_progress, written, total)
+        self.worker.submit(
+            lambda connection: export_articles(connection, filters, ascending, file_path, progress),
+            on_done=lambda written: messagebox.showinfo("成功", f"已导出 {written} 条数据到 {file_path}"),
+            on_error=lambda e: messagebox.showerror("错误", f"导出失败：{e}"),
+            supersede=False,
+        )
+
+    def show_export_progress(self, written, total):
+        """显示导出进度"""
+        if self.worker.active:
+            self.status_label["text"] = f"正在导出：{written} / {total}"
 
     def edit_record(self, event):
         """编辑选中记录"""
@@ -314,7 +692,23 @@ class DatabaseManagerApp:
         if not selected_item:
             return
 
-        record_values = self.tree.item(selected_item, "values")
+        # 表格中的摘要可能是检索片段，编辑前从数据库读取完整记录
+        record_id = int(self.tree.item(selected_item, "values")[0])
+        self.worker.submit(
+            lambda connection: connection.execute("SELECT * FROM articles WHERE id = ?", (record_id,)).fetchone(),
+            on_done=lambda record: self.open_editor(record_id, record),
+            on_error=lambda e: messagebox.showerror("错误", f"查询失败：{e}"),
+            supersede=False,
+        )
+
+    def open_editor(self, record_id, record):
+        """显示编辑窗口"""
+        if record is None:
+            messagebox.showwarning("警告", "该记录已不存在")
+            self.refresh()
+            return
+        record_values = ["" if value is None else value for value in record]
+
         edit_win = tk.Toplevel(self.root)
         edit_win.title("编辑记录")
         entry_vars = []
@@ -326,21 +720,30 @@ class DatabaseManagerApp:
 
         def save_changes():
             updated_values = [entry_vars[i].get() for i in range(len(record_values))]
-            update_query = f"""
-                UPDATE articles
-                SET title='{updated_values[1]}', date='{updated_values[2]}',
-                    province='{updated_values[3]}', city='{updated_values[4]}',
-                    keywords='{updated_values[5]}', summary='{updated_values[6]}', url='{updated_values[7]}'
-                WHERE id={updated_values[0]}
-            """
-            update_record(update_query)
             edit_win.destroy()
-            self.query_all_data()
+            self.worker.submit(
+                lambda connection: save_article(connection, record_id, updated_values[1:]),
+                on_done=self.show_updated_row,
+                on_error=lambda e: messagebox.showerror("错误", f"更新失败：{e}"),
+                supersede=False,
+            )
 
         tk.Button(edit_win, text="保存修改", command=save_changes).grid(row=len(record_values), column=0, columnspan=2, pady=10)
 
+    def show_updated_row(self, row):
+        """只刷新被修改的那一行，不重新加载整页"""
+        if row is None:
+            self.refresh()
+            return
+        self.source.replace_row(row)
+        for item in self.tree.get_children():
+            if int(self.tree.item(item, "values")[0]) == row[0]:
+                self.tree.item(item, values=row)
+        self.status_label["text"] = "记录更新成功"
+
 # 主函数
 if __name__ == "__main__":
+    database_manager.initialize_database(db_path)
     root = tk.Tk()
     app = DatabaseManagerApp(root)
     root.mainloop()
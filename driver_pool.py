@@ -0,0 +1,164 @@
+import os
+import threading
+from collections import deque
+
+# 静态抓取失败时使用的无头 Chrome 池：驱动按需创建、跨页面复用，
+# 每次取出前做健康检查，处理一定页数后退出重建，避免长时间运行的浏览器占用内存越来越多
+
+# chromedriver 路径，未设置时由 Selenium Manager 自动查找
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH") or None
+
+# 兜底只需要页面文本，图片、字体和样式表一律不加载
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+]
+
+
+# 创建一个无头、eager 加载策略且屏蔽静态资源的 Chrome 驱动
+def create_driver(driver_path=CHROMEDRIVER_PATH, timeout=20):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # DOMContentLoaded 后即返回，不等待图片、iframe 等子资源
+    options.page_load_strategy = "eager"
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+    })
+
+    driver = webdriver.Chrome(service=Service(driver_path), options=options)
+    driver.set_page_load_timeout(timeout)
+    # 偏好设置拦不住的字体和样式表在网络层屏蔽
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+class PooledDriver:
+    """池中的一个驱动及其已处理的页数"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    """最多 size 个驱动的浏览器池，每个驱动处理 max_pages 个页面后重建"""
+
+    def __init__(self, size=2, max_pages=50, driver_path=CHROMEDRIVER_PATH, timeout=20, factory=create_driver):
+        self.size = size
+        self.max_pages = max_pages
+        self.driver_path = driver_path
+        self.timeout = timeout
+        self.factory = factory
+        # 空闲驱动先进先出轮流使用，页数和内存占用在各驱动间保持均衡
+        self.idle = deque()
+        self.condition = threading.Condition()
+        self.created = 0  # 存活及正在创建的驱动数
+        self.closed = False
+        self.started = self.recycled = self.unhealthy = 0
+
+    # 退出驱动并腾出名额，通知等待的线程新建
+    def _discard(self, pooled):
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"关闭浏览器失败：{e}")
+
+    # 浏览器崩溃或会话失效时脚本调用会抛出异常
+    def _healthy(self, pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    # 优先取空闲驱动；池未满时新建一个，否则等待其他线程归还
+    def acquire(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("浏览器池已关闭")
+                    if self.idle:
+                        pooled = self.idle.popleft()
+                        break
+                    if self.created < self.size:
+                        self.created += 1
+                        pooled = None
+                        break
+                    self.condition.wait()
+
+            if pooled is None:
+                try:
+                    driver = self.factory(self.driver_path, self.timeout)
+                except Exception:
+                    with self.condition:
+                        self.created -= 1
+                        self.condition.notify()
+                    raise
+                with self.condition:
+                    self.started += 1
+                return PooledDriver(driver)
+
+            if self._healthy(pooled):
+                return pooled
+            print("浏览器已失效，重新创建")
+            with self.condition:
+                self.unhealthy += 1
+            self._discard(pooled)
+
+    def release(self, pooled, broken=False):
+        """归还驱动；broken=True 或已达到页数上限时退出该驱动，下次取用时重建"""
+        pooled.pages += 1
+        with self.condition:
+            keep = not broken and not self.closed and pooled.pages < self.max_pages
+            if keep:
+                self.idle.append(pooled)
+                self.condition.notify()
+                return
+            if not broken and pooled.pages >= self.max_pages:
+                self.recycled += 1
+        self._discard(pooled)
+
+    def run(self, func, url):
+        """取出一个驱动执行 func(driver, url)，驱动本身出错时丢弃"""
+        from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+        pooled = self.acquire()
+        try:
+            result = func(pooled.driver, url)
+        except (TimeoutException, NoSuchElementException):
+            # 页面加载超时或结构不符，驱动仍可继续使用
+            self.release(pooled)
+            raise
+        except Exception:
+            self.release(pooled, broken=True)
+            raise
+        self.release(pooled)
+        return result
+
+    def stats(self):
+        with self.condition:
+            return {"started": self.started, "recycled": self.recycled, "unhealthy": self.unhealthy}
+
+    def close(self):
+        # 空闲驱动立即退出，使用中的驱动在归还时退出
+        with self.condition:
+            self.closed = True
+            idle, self.idle = list(self.idle), deque()
+            self.condition.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
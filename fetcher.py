@@ -0,0 +1,271 @@
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+from driver_pool import CHROMEDRIVER_PATH, DriverPool
+from throttle import RETRY_STATUS, ThrottledSession
+
+# 政策新闻列表页地址
+LIST_URL = "https://news.bjx.com.cn/zc/{page}/"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+}
+
+# 北极星站点统一使用 UTF-8 编码
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+class ParseError(Exception):
+    """页面结构不符合预期，静态解析失败"""
+
+
+# 创建带连接池的 keep-alive 会话
+def create_session(pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+# 解析列表页，返回 (标题, 日期, 链接) 列表
+def parse_list_page(content, base_url):
+    tree = lxml_html.fromstring(content, parser=HTML_PARSER)
+    entries = []
+    for link in tree.xpath("//a[@title]"):
+        title_text = link.text_content().strip() or link.get("title", "").strip()
+        href = link.get("href")
+        spans = link.xpath("..//following-sibling::span")
+        if not title_text or not href or not spans:
+            continue
+        date_text = spans[0].text_content().strip()
+        entries.append((title_text, date_text, urljoin(base_url, href)))
+
+    if not entries:
+        raise ParseError(f"列表页未找到文章链接：{base_url}")
+    return entries
+
+
+# 解析详情页，返回 (正文, 关键词列表)
+def parse_detail_page(content, url):
+    tree = lxml_html.fromstring(content, parser=HTML_PARSER)
+    article = tree.get_element_by_id("article_cont", None)
+    if article is None:
+        raise ParseError(f"详情页未找到正文：{url}")
+
+    content_text = article.text_content().strip()
+    keywords = []
+    keywords_element = tree.get_element_by_id("key_word", None)
+    if keywords_element is not None:
+        keywords = [a.text_content().strip() for a in keywords_element.iter("a")]
+    return content_text, keywords
+
+
+# 解析列表条目的日期，无法解析时返回 None
+def parse_listing_date(date_text):
+    try:
+        return datetime.strptime(date_text, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+# 列表页中最早的日期
+def oldest_listing_date(entries):
+    dates = [date_obj for date_obj in (parse_listing_date(entry[1]) for entry in entries) if date_obj]
+    return min(dates) if dates else None
+
+
+# 浏览器兜底只在网络层出错时重试并视为站点过载；等待元素超时、页面结构不符或缺少 chromedriver
+# 是页面或本机的问题，重试无益，也不应降低该主机的并发上限
+def browser_retryable(outcome):
+    if not isinstance(outcome, Exception):
+        return False
+    from selenium.common.exceptions import NoSuchDriverException, TimeoutException, WebDriverException
+
+    if isinstance(outcome, (NoSuchDriverException, TimeoutException)):
+        return False
+    return isinstance(outcome, WebDriverException) and "net::ERR_" in str(outcome)
+
+
+class BrowserFallback:
+    """仅在静态解析失败时使用的无头浏览器，驱动来自按需创建的 DriverPool"""
+
+    def __init__(self, driver_path=CHROMEDRIVER_PATH, timeout=20, pool_size=2, max_pages=50):
+        self.timeout = timeout
+        # WebDriver 不是线程安全的，每个驱动同一时间只给一个抓取线程使用
+        self.pool = DriverPool(pool_size, max_pages, driver_path, timeout)
+
+    def fetch_list(self, url):
+        return self.pool.run(self._fetch_list, url)
+
+    def fetch_detail(self, url):
+        return self.pool.run(self._fetch_detail, url)
+
+    def _fetch_list(self, driver, url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get(url)
+        titles = WebDriverWait(driver, self.timeout).until(
+            ec.presence_of_all_elements_located((By.CSS_SELECTOR, "a[title]"))
+        )
+        entries = []
+        for title in titles:
+            try:
+                date_text = title.find_element(By.XPATH, "..//following-sibling::span").text
+            except Exception:
+                continue
+            entries.append((title.text, date_text, title.get_attribute("href")))
+        return entries
+
+    def _fetch_detail(self, driver, url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get(url)
+        content_text = WebDriverWait(driver, self.timeout).until(
+            ec.presence_of_element_located((By.ID, "article_cont"))
+        ).text
+
+        keywords = []
+        try:
+            keywords_element = driver.find_element(By.ID, "key_word")
+            keywords = [a.text for a in keywords_element.find_elements(By.TAG_NAME, "a")]
+        except Exception:
+            pass
+        return content_text, keywords
+
+    def stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.close()
+
+
+class PageFetcher:
+    """HTTP 优先的页面抓取器，解析失败时回退到浏览器"""
+
+    def __init__(self, timeout=15, pool_size=10, driver_path=CHROMEDRIVER_PATH, browser_timeout=20,
+                 parse_pool=None, cache=None, throttle=None, browser_workers=2, browser_max_pages=50):
+        self.timeout = timeout  # 秒数或 (连接超时, 读取超时)
+        # 可选的进程池：HTML 解析放到子进程中执行，不与抓取线程争用 GIL
+        self.parse_pool = parse_pool
+        self.cache = cache  # 可选的 HttpCache，回放模式下只读缓存、不启动浏览器
+        self.session = create_session(pool_size)
+        # 可选的 Throttle：按主机限速、自适应并发，失败时退避重试
+        self.throttle = throttle
+        if throttle is not None:
+            self.session = ThrottledSession(self.session, throttle)
+        self.browser = BrowserFallback(driver_path, browser_timeout, browser_workers, browser_max_pages)
+        self.list_cache = {}  # 本次爬取已抓取的列表页：页码 -> 条目
+
+    def _get(self, url):
+        if self.cache is not None:
+            return self.cache.fetch(self.session, url, self.timeout)
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    # 静态抓取或解析失败时改用浏览器；回放模式下不访问网络，直接抛出原错误
+    def _fallback(self, fetch, url, error, message):
+        if self.cache is not None and self.cache.replay:
+            raise error
+        print(f"{message}，改用浏览器：{url} - {error}")
+        if self.throttle is not None:
+            return self.throttle.call(fetch, url, browser_retryable)
+        return fetch(url)
+
+    # 解析函数在子进程中运行，只传回 (标题, 日期, 链接) 或 (正文, 关键词) 这样的简单数据
+    def _parse(self, parser, content, url):
+        if self.parse_pool is None:
+            return parser(content, url)
+        return self.parse_pool.submit(parser, content, url).result()
+
+    def fetch_list(self, page_num):
+        if page_num in self.list_cache:
+            return self.list_cache[page_num]
+        url = LIST_URL.format(page=page_num)
+        try:
+            entries = self._parse(parse_list_page, self._get(url), url)
+        except (requests.RequestException, ParseError) as e:
+            entries = self._fallback(self.browser.fetch_list, url, e, "静态抓取列表页失败")
+        self.list_cache[page_num] = entries
+        return entries
+
+    # 列表按日期倒序排列，倍增加二分跳过整页都晚于 end_date 的页面
+    def find_start_page(self, end_date, max_pages):
+        def too_new(page_num):
+            try:
+                oldest = oldest_listing_date(self.fetch_list(page_num))
+            except Exception as e:
+                print(f"错误：定位起始页失败 - {e}")
+                return False
+            return oldest is not None and oldest > end_date
+
+        if not too_new(1):
+            return 1
+
+        low, step = 1, 1
+        high = low + step
+        while high <= max_pages and too_new(high):
+            low = high
+            step *= 2
+            high = low + step
+        if low >= max_pages:
+            return max_pages
+        high = min(high, max_pages)
+
+        # 在 (low, high] 中二分查找第一个包含不晚于 end_date 条目的页面
+        while high - low > 1:
+            middle = (low + high) // 2
+            if too_new(middle):
+                low = middle
+            else:
+                high = middle
+        return high
+
+    # 只下载详情页 HTML，返回 (HTML, None)；静态请求失败时由浏览器直接取回，返回 (None, (正文, 关键词))
+    def download_detail(self, url):
+        try:
+            return self._get(url), None
+        except requests.RequestException as e:
+            if self._retries_exhausted(e):
+                raise
+            return None, self._fallback(self.browser.fetch_detail, url, e, "静态抓取详情页失败")
+
+    # 限速会话已对超时、连接错误和 429/5xx 退避重试过，这些错误换浏览器也无济于事，交给流水线记入失败表
+    def _retries_exhausted(self, error):
+        if self.throttle is None:
+            return False
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code in RETRY_STATUS
+        return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+    # 解析已下载的详情页，页面结构不符时回退到浏览器
+    def parse_detail(self, content, url):
+        try:
+            return self._parse(parse_detail_page, content, url)
+        except ParseError as e:
+            return self._fallback(self.browser.fetch_detail, url, e, "静态解析详情页失败")
+
+    def close(self):
+        self.session.close()
+        self.browser.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
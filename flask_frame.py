@@ -1,76 +1,209 @@
-from flask import Flask, request, render_template
-import sqlite3
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context, url_for
 import csv
-from flask import jsonify
+import io
+import json
+import zlib
+import hashlib
+import os
+from types import MappingProxyType
+from markupsafe import Markup, escape
+import database_manager
+from gazetteer import MAPPING_FILE, load_mapping_rows
+from query_cache import QueryCache
 
 app = Flask(__name__)
 
-# 数据库查询函数
-def fetch_filtered_data(keyword, start_date, end_date, province, city, db_path='news_data.db'):
-    query = "SELECT * FROM articles WHERE 1=1"
-    params = []
-
-    if keyword:
-        query += " AND (title LIKE ? OR keywords LIKE ? OR summary LIKE ?)"
-        params.extend([f"%{keyword}%"] * 3)
-    if start_date:
-        query += " AND date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND date <= ?"
-        params.append(end_date)
-    if province:
-        query += " AND province = ?"
-        params.append(province)
-    if city:
-        query += " AND city = ?"
-        params.append(city)
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+# 全文检索高亮片段的占位标记，转义后再替换为 <mark>
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+# 每页条数及允许的最大值
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 查询结果缓存，爬虫写入新数据后自动失效
+query_cache = QueryCache('news_data.db')
+
+# 按 (date, id) 键集分页查询一页数据，返回 (数据行, 该方向是否还有更多)
+def fetch_filtered_page(filters, page_size=PAGE_SIZE, after=None, before=None, db_path='news_data.db'):
+    query, params = database_manager.build_article_query(
+        highlight=(HIGHLIGHT_START, HIGHLIGHT_END), after=after, before=before, limit=page_size + 1, **filters
+    )
+
+    conn = database_manager.get_read_connection(db_path)
+    rows = conn.execute(query, params).fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if before:
+        rows.reverse()  # 向前翻页时按升序查询，需要翻转回倒序
+    return rows, has_more
+
+# 统计筛选结果总数
+def count_filtered_data(filters, db_path='news_data.db'):
+    query, params = database_manager.build_article_count_query(**filters)
+    conn = database_manager.get_read_connection(db_path)
+    return conn.execute(query, params).fetchone()[0]
+
+# 从请求参数中读取与首页相同的筛选条件
+def request_filters():
+    return {
+        name: request.args.get(name, '').strip()
+        for name in ('keyword', 'start_date', 'end_date', 'province', 'city')
+    }
+
+# 解析分页游标 "日期,ID"
+def parse_cursor(value):
+    date_text, _, id_text = value.rpartition(",")
+    if not date_text or not id_text.isdigit():
+        return None
+    return date_text, int(id_text)
+
+def format_cursor(row):
+    return f"{row[2]},{row[0]}"
+
+# 将检索片段转义后加上高亮标签
+def highlight_snippet(text):
+    if not text:
+        return text
+    escaped = str(escape(text))
+    return Markup(escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>"))
 
 
 @app.route('/')
 def index():
     # 获取查询参数
-    keyword = request.args.get('keyword', '').strip()
-    start_date = request.args.get('start_date', '').strip()
-    end_date = request.args.get('end_date', '').strip()
-    province = request.args.get('province', '').strip()
-    city = request.args.get('city', '').strip()
-
-    # 获取过滤后的数据
-    rows = fetch_filtered_data(keyword, start_date, end_date, province, city)
-    rows = [row[1:] for row in rows]  # 剔除 ID
-    return render_template('index.html', rows=rows)
-
-# 读取省市映射
-def load_province_city_mapping(csv_path="province_city_mapping.csv"):
+    filters = request_filters()
+    page_size = min(max(request.args.get('page_size', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    page = max(request.args.get('page', 1, type=int), 1)
+    after = parse_cursor(request.args.get('after', ''))
+    before = parse_cursor(request.args.get('before', ''))
+
+    # 获取当前页数据和总数，相同的筛选条件和游标直接走缓存
+    filter_key = tuple(filters[name] for name in sorted(filters))
+    rows, has_more = query_cache.get_or_compute(
+        ('page', filter_key, page_size, after, before),
+        lambda: fetch_filtered_page(filters, page_size, after, before),
+    )
+    total = query_cache.get_or_compute(('count', filter_key), lambda: count_filtered_data(filters))
+
+    # 构造翻页链接，保留筛选条件
+    query_args = {name: value for name, value in filters.items() if value}
+    export_args = dict(query_args)
+    query_args['page_size'] = page_size
+    first_url = url_for('index', **query_args)
+    prev_url = next_url = None
+    if rows and (after or (before and has_more)):
+        prev_url = url_for('index', **query_args, page=max(page - 1, 1), before=format_cursor(rows[0]))
+    if rows and (before or has_more):
+        next_url = url_for('index', **query_args, page=page + 1, after=format_cursor(rows[-1]))
+
+    rows = [row[1:6] + (highlight_snippet(row[6]), row[7]) for row in rows]  # 剔除 ID，摘要中高亮检索词
+    return render_template(
+        'index.html', rows=rows, filters=filters, total=total, page=page,
+        total_pages=max(1, (total + page_size - 1) // page_size),
+        first_url=first_url, prev_url=prev_url, next_url=next_url,
+        export_csv_url=url_for('export_csv', **export_args), export_ndjson_url=url_for('export_ndjson', **export_args),
+    )
+
+# 导出时每次从游标读取的行数
+EXPORT_CHUNK_SIZE = 500
+EXPORT_COLUMNS = ["id", "title", "date", "province", "city", "keywords", "summary", "url"]
+
+# 逐块读取筛选结果，游标在生成器结束或客户端断开时关闭
+def iter_filtered_chunks(filters, db_path='news_data.db'):
+    query, params = database_manager.build_article_query(order_by_date=True, snippet=False, **filters)
+    cursor = database_manager.get_read_connection(db_path).execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def csv_chunks(filters):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")  # BOM，便于 Excel 识别 UTF-8
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in iter_filtered_chunks(filters):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def ndjson_chunks(filters):
+    for rows in iter_filtered_chunks(filters):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+
+# 增量 gzip 压缩
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+# 以分块传输流式返回导出内容，gzip=1 时压缩
+def export_response(chunks, mimetype, filename):
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if request.args.get('gzip') == '1':
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(query_cache.stats())
+
+@app.route('/export.csv')
+def export_csv():
+    return export_response(csv_chunks(request_filters()), 'text/csv; charset=utf-8', 'articles.csv')
+
+@app.route('/export.ndjson')
+def export_ndjson():
+    return export_response(ndjson_chunks(request_filters()), 'application/x-ndjson', 'articles.ndjson')
+
+# 由映射表的 (省, 市) 行构造只读的 {省: (市, ...)}，城市去重并保持文件顺序
+def build_province_city_mapping(rows):
     mapping = {}
-    with open(csv_path, encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader)  # 跳过表头
-        for province, city in reader:
-            if not province or not city:  # 排除省市为空的行
-                continue
-            # 规范化处理省名，去除多余的空格
-            province = province.strip()
-            city = city.strip()
-
-            if province not in mapping:
-                mapping[province] = set()  # 使用集合去重
-            mapping[province].add(city)
-    # 转回列表形式
-    return {province: list(cities) for province, cities in mapping.items()}
+    for province, city in rows:
+        mapping.setdefault(province, {})[city] = None
+    return MappingProxyType({province: tuple(cities) for province, cities in mapping.items()})
+
+# 省市映射缓存：文件路径 -> ((修改时间, 文件大小), 映射, JSON 字节, ETag)
+mapping_cache = {}
+
+# 读取省市映射，文件未变化时直接返回缓存
+def load_mapping_entry(csv_path=MAPPING_FILE):
+    stat = os.stat(csv_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = mapping_cache.get(csv_path)
+    if cached is None or cached[0] != signature:
+        with open(csv_path, "rb") as f:
+            raw = f.read()
+        mapping = build_province_city_mapping(load_mapping_rows(csv_path))
+        body = json.dumps(dict(mapping), ensure_ascii=False).encode("utf-8")
+        cached = (signature, mapping, body, hashlib.sha256(raw).hexdigest())
+        mapping_cache[csv_path] = cached
+    return cached
 
 @app.route('/get_province_city_mapping')
 def get_province_city_mapping():
-    mapping = load_province_city_mapping()
-    return jsonify(mapping)
+    _, _, body, etag = load_mapping_entry()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    # 客户端携带相同的 If-None-Match 时返回 304
+    return response.make_conditional(request)
 
 if __name__ == '__main__':
+    database_manager.initialize_database()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import csv
+import os
+from collections import deque
+
+# 省市映射表路径
+MAPPING_FILE = "province_city_mapping.csv"
+
+
+# 读取省市映射表，返回去除空值后的 (省, 市) 列表，保持文件顺序
+def load_mapping_rows(csv_path=MAPPING_FILE):
+    rows = []
+    with open(csv_path, encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)  # 跳过表头
+        for row in reader:
+            if len(row) < 2:
+                continue
+            province, city = row[0].strip(), row[1].strip()
+            if province and city:
+                rows.append((province, city))
+    return rows
+
+
+class Automaton:
+    """Aho-Corasick 多模式匹配自动机，一次扫描找出所有词条"""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]  # 每个状态结束的词条长度
+
+        for word in words:
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                state = next_state
+            if len(word) not in self.outputs[state]:
+                self.outputs[state] = self.outputs[state] + (len(word),)
+
+        # 广度优先构造失败指针，并沿失败链合并输出
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def finditer(self, text):
+        """按出现顺序返回不重叠的匹配，同一起点优先最长词条"""
+        candidates = []
+        state = 0
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length in outputs[state]:
+                candidates.append((end - length, -length))
+
+        candidates.sort()
+        last_end = 0
+        for start, negative_length in candidates:
+            if start >= last_end:
+                last_end = start - negative_length
+                yield text[start:last_end]
+
+    def findall(self, text):
+        return list(self.finditer(text))
+
+
+class Gazetteer:
+    """省市地名词典：多模式匹配 + 城市到省份的字典查找"""
+
+    def __init__(self, rows):
+        self.provinces = []
+        self.city_to_province = {}
+        for province, city in rows:
+            if province not in self.provinces:
+                self.provinces.append(province)
+            # 同名城市以映射表中第一条为准
+            self.city_to_province.setdefault(city, province)
+
+        self.province_matcher = Automaton(self.provinces)
+        self.city_matcher = Automaton(self.city_to_province)
+
+    def find_provinces(self, text):
+        return self.province_matcher.findall(text)
+
+    def find_cities(self, text):
+        return self.city_matcher.findall(text)
+
+    def province_for_city(self, city_name):
+        return self.city_to_province.get(city_name)
+
+    def tag_first(self, text):
+        """只保留第一个省和第一个市，市名匹配但无省名时补全省份"""
+        province = next(self.province_matcher.finditer(text), None)
+        city = next(self.city_matcher.finditer(text), None)
+        if city and not province:
+            province = self.province_for_city(city)
+        return province, city
+
+    def tag_all(self, text):
+        """保留全部匹配，以逗号拼接，无省名时按第一个市补全省份"""
+        found_provinces = self.find_provinces(text)
+        found_cities = self.find_cities(text)
+        if found_cities and not found_provinces:
+            province_from_city = self.province_for_city(found_cities[0])
+            if province_from_city:
+                found_provinces.append(province_from_city)
+
+        province_text = ", ".join(found_provinces) if found_provinces else None
+        city_text = ", ".join(found_cities) if found_cities else None
+        return province_text, city_text
+
+
+_gazetteers = {}  # 映射表路径 -> ((修改时间, 文件大小), 词典)
+
+
+# 获取共享的地名词典，首次调用或映射表修改后重新构建
+def get_gazetteer(csv_path=MAPPING_FILE):
+    stat = os.stat(csv_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _gazetteers.get(csv_path)
+    if cached is None or cached[0] != signature:
+        cached = (signature, Gazetteer(load_mapping_rows(csv_path)))
+        _gazetteers[csv_path] = cached
+    return cached[1]
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# 本地 HTTP 响应缓存：正文按 SHA-256 内容寻址压缩存放，索引记录 ETag/Last-Modified
+# 再次抓取时带条件请求头重新验证，304 时直接使用本地副本
+
+# 未被索引引用的正文超过这个时间（秒）才删除，较新的可能是另一个进程刚写入、尚未登记到索引
+ORPHAN_MIN_AGE = 3600
+
+
+class CacheMiss(Exception):
+    """回放模式下缓存中没有该链接"""
+
+
+class HttpCache:
+    """按总大小做 LRU 淘汰的磁盘响应缓存，replay=True 时完全不访问网络"""
+
+    def __init__(self, directory="http_cache", max_bytes=512 * 1024 * 1024, replay=False):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.max_bytes = max_bytes
+        self.replay = replay
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        # 多个抓取线程共用一个索引连接，操作都很短，用锁串行
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries (digest)')
+        # 回放只读缓存，不清理文件，大小直接取自索引
+        self.total_bytes = self._indexed_bytes() if replay else self._stored_bytes()
+        self.hits = self.revalidated = self.misses = 0  # 多个抓取线程同时计数，在锁内更新
+
+    def _indexed_bytes(self):
+        return self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)'
+        ).fetchone()[0]
+
+    # 按磁盘上实际的文件统计缓存大小，顺带删除索引中已不再引用的正文和中断写入留下的临时文件
+    # 其他进程可能同时在写入或淘汰，文件随时可能出现或消失
+    def _stored_bytes(self):
+        referenced = {row[0] for row in self.connection.execute('SELECT DISTINCT digest FROM entries')}
+        cutoff = time.time() - ORPHAN_MIN_AGE
+        total = 0
+        for directory, _, names in os.walk(self.objects_dir):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    if name in referenced:
+                        total += os.path.getsize(path)
+                    elif os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    continue
+        return total
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _read_object(self, digest):
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    # 正文相同的页面只保存一份，压缩后的大小计入缓存总量；调用方持有锁
+    def _write_object(self, digest, compressed):
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return os.path.getsize(path), False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(temp_path, path)
+        return len(compressed), True
+
+    def lookup(self, url):
+        """返回 (摘要, ETag, Last-Modified) 或 None"""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT digest, etag, last_modified FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+
+    def _touch(self, url):
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (time.time(), url))
+
+    def store(self, url, body, etag=None, last_modified=None):
+        digest = hashlib.sha256(body).hexdigest()
+        compressed = zlib.compress(body, 6)  # 压缩在锁外进行
+        now = time.time()
+        with self.lock:
+            previous = self.connection.execute('SELECT digest FROM entries WHERE url = ?', (url,)).fetchone()
+            size, created = self._write_object(digest, compressed)
+            with self.connection:
+                self.connection.execute('''
+                    INSERT INTO entries (url, digest, size, etag, last_modified, fetched_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        digest = excluded.digest,
+                        size = excluded.size,
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        fetched_at = excluded.fetched_at,
+                        accessed_at = excluded.accessed_at
+                ''', (url, digest, size, etag, last_modified, now, now))
+            if created:
+                self.total_bytes += size
+            # 页面内容变化后旧正文不再被该链接引用，没有其他链接使用时删除
+            if previous is not None and previous[0] != digest:
+                self._remove_unused_object(previous[0])
+            self._evict()
+
+    # 删除没有任何条目引用的正文文件并扣减缓存大小；调用方持有锁
+    def _remove_unused_object(self, digest):
+        still_used = self.connection.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone()
+        if still_used:
+            return
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            self.total_bytes -= os.path.getsize(path)
+            os.remove(path)
+
+    # 超出容量时按最近访问时间淘汰，直到降到上限的 90%；调用方持有锁
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = self.connection.execute('SELECT url, digest FROM entries ORDER BY accessed_at').fetchall()
+        with self.connection:
+            for url, digest in rows:
+                if self.total_bytes <= target:
+                    break
+                self.connection.execute('DELETE FROM entries WHERE url = ?', (url,))
+                self._remove_unused_object(digest)
+
+    def fetch(self, session, url, timeout=15):
+        """带条件请求头抓取 url，返回响应正文；回放模式只读缓存"""
+        cached = self.lookup(url)
+        if self.replay:
+            if cached is None:
+                raise CacheMiss(f"缓存中没有该页面：{url}")
+            try:
+                body = self._read_object(cached[0])
+            except (OSError, zlib.error):
+                # 正文被其他进程淘汰或已损坏，回放时无法重新下载
+                raise CacheMiss(f"缓存中该页面的正文已丢失：{url}")
+            with self.lock:
+                self.hits += 1
+            self._touch(url)
+            return body
+
+        headers = {}
+        if cached is not None:
+            if cached[1]:
+                headers["If-None-Match"] = cached[1]
+            if cached[2]:
+                headers["If-Modified-Since"] = cached[2]
+
+        response = session.get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            try:
+                body = self._read_object(cached[0])
+            except (OSError, zlib.error):
+                # 本地副本丢失或损坏时去掉条件头重新下载
+                response = session.get(url, timeout=timeout)
+            else:
+                with self.lock:
+                    self.revalidated += 1
+                self._touch(url)
+                return body
+
+        response.raise_for_status()
+        with self.lock:
+            self.misses += 1
+        self.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.content
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,562 @@
+import argparse
+import multiprocessing
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+import schedule
+import database_manager
+from gazetteer import get_gazetteer
+
+# 爬取流水线：列表发现 → 过滤 → 详情抓取 → 解析 → 打标签 → 入库
+# 各阶段之间用有界队列连接，下游变慢时上游在 put 处阻塞（背压）
+
+# 标题中包含这些字的文章不收录
+FILTER_KEYWORDS = ["废", "污", "环境", "公示", "空气", "汇总", "解读", "秸秆", "垃圾"]
+
+STOP = object()  # 队列结束标记，每个工作线程消费一个
+
+# 收尾写库遇到数据库被锁定时的重试次数和间隔（秒）
+LOCKED_RETRIES = 5
+LOCKED_RETRY_DELAY = 2.0
+
+
+# 执行收尾的数据库写入，数据库被其他连接锁定时等待后重试
+def retry_locked(func, *args, **kwargs):
+    for attempt in range(LOCKED_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if attempt == LOCKED_RETRIES or "locked" not in str(e) and "busy" not in str(e):
+                raise
+            print(f"数据库被锁定，{LOCKED_RETRY_DELAY:g} 秒后重试：{e}")
+            time.sleep(LOCKED_RETRY_DELAY)
+
+
+class CrawlConfig:
+    """一个爬虫脚本的流水线配置"""
+
+    def __init__(self, name="zc", source="zc", max_pages=100, browser_timeout=20, tag_mode="first",
+                 filter_keywords=FILTER_KEYWORDS, fetch_workers=8, parse_workers=2, queue_size=100, batch_size=50,
+                 db_name="news_data.db",
+                 cache_mode="normal", cache_dir="http_cache", cache_max_bytes=512 * 1024 * 1024,
+                 request_rate=4.0, connect_timeout=5, read_timeout=15, max_retries=3,
+                 browser_workers=2, browser_max_pages=50, driver_path=None):
+        self.name = name  # 运行记录中的爬虫名称，续爬时按名称查找
+        self.source = source  # 高水位线所属的栏目，对应 crawl_state 表中的 source
+        self.max_pages = max_pages
+        self.browser_timeout = browser_timeout
+        self.tag_mode = tag_mode  # first 只保留第一个省市，all 保留全部匹配
+        self.filter_keywords = filter_keywords
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers  # 解析子进程数，0 表示在线程中直接解析
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.db_name = db_name
+        # normal 条件请求重新验证缓存，replay 只从缓存回放、不访问网络，off 不使用缓存
+        self.cache_mode = cache_mode
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        # 每个主机每秒最多发起的请求数；并发上限在 1 到 fetch_workers 之间自适应
+        self.request_rate = request_rate
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries  # 超时、429/5xx 及浏览器失败的最多重试次数
+        # 兜底浏览器池：最多同时运行的无头 Chrome 数，每个处理多少页后重建
+        self.browser_workers = browser_workers
+        self.browser_max_pages = browser_max_pages
+        self.driver_path = driver_path  # 为 None 时读取环境变量 CHROMEDRIVER_PATH
+
+
+class Stage:
+    """流水线的一个阶段：若干线程从输入队列取数据，处理结果放入下一阶段的队列"""
+
+    def __init__(self, name, handler, workers=1, queue_size=100, on_idle=None, on_finish=None, on_error=None,
+                 idle_timeout=1.0):
+        self.name = name
+        self.handler = handler  # handler(item, emit)
+        self.on_error = on_error  # on_error(stage, item, 异常)，记录处理失败的数据
+        self.workers = workers
+        self.input = queue.Queue(maxsize=queue_size)
+        self.on_idle = on_idle  # 输入队列暂时为空时调用，例如提交缓冲的写入
+        self.on_finish = on_finish  # 每个工作线程退出前调用
+        self.idle_timeout = idle_timeout
+        self.next_stage = None
+        self.threads = []
+        self.lock = threading.Lock()
+        self.running = workers
+        self.processed = 0
+        self.errors = 0
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def emit(self, item):
+        self.next_stage.input.put(item)
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    item = self.input.get(timeout=self.idle_timeout if self.on_idle else None)
+                except queue.Empty:
+                    try:
+                        self.on_idle()
+                    except Exception as e:
+                        # 例如数据库被其他进程锁定，缓冲的数据保留到下次空闲时重试
+                        print(f"错误：{self.name} 阶段空闲处理失败，稍后重试 - {e}")
+                    continue
+                if item is STOP:
+                    break
+                try:
+                    self.handler(item, self.emit)
+                except Exception as e:
+                    print(f"错误：{self.name} 阶段处理失败 - {e}")
+                    with self.lock:
+                        self.errors += 1
+                    if self.on_error:
+                        self.on_error(self, item, e)
+                else:
+                    with self.lock:
+                        self.processed += 1
+        finally:
+            if self.on_finish:
+                try:
+                    self.on_finish()
+                except Exception as e:
+                    print(f"错误：{self.name} 阶段收尾失败 - {e}")
+            # 最后一个退出的线程通知下游结束
+            with self.lock:
+                self.running -= 1
+                last = self.running == 0
+            if last and self.next_stage:
+                for _ in range(self.next_stage.workers):
+                    self.next_stage.input.put(STOP)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+
+class CrawlPipeline:
+    """按配置组装各阶段，运行一次日期范围内的爬取"""
+
+    def __init__(self, config, start_date, end_date, high_water_mark=None, resume_run=None):
+        self.config = config
+        self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        self.end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        self.high_water_mark = high_water_mark
+        self.stopping = threading.Event()
+        self.store_failed = False  # 最后一批文章未能写入，运行需要保持可续爬
+        self.newest_seen = None  # 本次遍历到的不晚于结束日期的最新条目，作为新的高水位线
+        self.writer = None
+
+        # requests/lxml 只在真正爬取时才导入，缩短定时任务进程的启动时间
+        from fetcher import CHROMEDRIVER_PATH, PageFetcher
+
+        # 在启动任何线程之前创建进程池；spawn 方式避免 fork 继承其他线程持有的锁
+        self.parse_pool = None
+        if config.parse_workers:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.parse_pool = ProcessPoolExecutor(
+                config.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self.cache = None
+        if config.cache_mode != "off":
+            from http_cache import HttpCache
+
+            self.cache = HttpCache(config.cache_dir, config.cache_max_bytes, replay=config.cache_mode == "replay")
+        from throttle import Throttle
+
+        self.throttle = Throttle(
+            config.request_rate, max_concurrency=config.fetch_workers, max_retries=config.max_retries
+        )
+        self.fetcher = PageFetcher(
+            timeout=(config.connect_timeout, config.read_timeout), browser_timeout=config.browser_timeout,
+            pool_size=config.fetch_workers, parse_pool=self.parse_pool,
+            cache=self.cache, throttle=self.throttle, driver_path=config.driver_path or CHROMEDRIVER_PATH,
+            browser_workers=config.browser_workers, browser_max_pages=config.browser_max_pages,
+        )
+        self.gazetteer = get_gazetteer()
+        self.known_urls = database_manager.load_known_urls(config.db_name)
+        self.queued_urls = set()  # 本次已进入流水线的链接
+
+        # 爬取进度：与文章批次在同一事务中写入 crawl_runs，中断后可从这里续爬
+        self.state_lock = threading.Lock()
+        self.pending = {}  # 已发现但尚未入库、过滤或失败的文章：链接 -> (标题, 日期, 链接)
+        self.state_dirty = False
+        if resume_run is None:
+            self.run_id = database_manager.start_crawl_run(
+                config.name, start_date, end_date, high_water_mark, config.db_name
+            )
+            self.last_page = 0  # 已翻完的最后一页
+            self.discovery_done = False
+            self.resume_items = []
+            self.failures = []  # 重试用尽仍失败的 (链接, 阶段, 错误)，运行结束时写入死信表
+        else:
+            self.run_id = resume_run["id"]
+            self.last_page = resume_run["last_page"]
+            self.discovery_done = bool(resume_run["discovery_done"])
+            if resume_run["newest_date"]:
+                self.newest_seen = (resume_run["newest_date"], resume_run["newest_url"])
+            self.resume_items = [tuple(item) for item in resume_run["pending"]]
+            self.failures = [tuple(failure) for failure in resume_run["failures"]]
+
+        self.stages = [
+            Stage("discover", self.discover, 1, config.queue_size),
+            Stage("filter", self.filter, 1, config.queue_size),
+            Stage("fetch", self.fetch, config.fetch_workers, config.queue_size, on_error=self.record_failure),
+            # 每个解析子进程对应一个提交线程，保证进程池始终有任务
+            Stage("parse", self.parse, max(1, config.parse_workers), config.queue_size, on_error=self.record_failure),
+            Stage("tag", self.tag, 1, config.queue_size),
+            Stage("store", self.store, 1, config.queue_size, on_idle=self.flush, on_finish=self.close_writer),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+
+    # 列表发现：从第一个相关页面开始翻页，到开始日期或高水位线为止
+    def discover(self, _, emit):
+        # 续爬时先重新排队上次未处理完的文章，再从下一页继续翻页
+        for item in self.resume_items:
+            self.track(item)
+            emit(item)
+        if self.discovery_done:
+            return
+
+        if self.last_page:
+            first_page = self.last_page + 1
+        else:
+            first_page = self.fetcher.find_start_page(self.end_date, self.config.max_pages)
+        for page_num in range(first_page, self.config.max_pages + 1):
+            if self.stopping.is_set():
+                return
+            try:
+                reached_end = self.discover_page(page_num, emit)
+            except Exception as e:
+                from fetcher import LIST_URL
+
+                print(f"错误：{e}")
+                self.add_failure(LIST_URL.format(page=page_num), "discover", e)
+                reached_end = False
+            self.page_done(page_num, reached_end)
+            # 列表按日期倒序，后续页面只会更早
+            if reached_end:
+                print(f"页面 {page_num} 已早于开始日期，停止翻页")
+                return
+        self.page_done(self.config.max_pages, True)
+
+    def page_done(self, page_num, discovery_done):
+        with self.state_lock:
+            self.last_page = page_num
+            self.discovery_done = discovery_done
+            self.state_dirty = True
+
+    def track(self, item):
+        with self.state_lock:
+            self.pending[item[2]] = item
+            self.state_dirty = True
+
+    def untrack(self, url):
+        with self.state_lock:
+            if self.pending.pop(url, None) is not None:
+                self.state_dirty = True
+
+    def discover_page(self, page_num, emit):
+        reached_end = False
+        for title_text, date_text, title_url in self.fetcher.fetch_list(page_num):
+            try:
+                date_obj = datetime.strptime(date_text, "%Y-%m-%d")
+            except Exception as e:
+                print(f"错误：无法获取日期 - {e}")
+                continue
+
+            if date_obj > self.end_date:
+                continue
+
+            # 到达上次定时任务的高水位线，之后的条目均已处理过
+            mark = self.high_water_mark
+            if mark and (title_url == mark[1] or date_text < mark[0]):
+                return True
+
+            if self.newest_seen is None:
+                self.newest_seen = (date_text, title_url)
+
+            if date_obj < self.start_date:
+                reached_end = True
+                continue
+
+            item = (title_text, date_text, title_url)
+            self.track(item)
+            emit(item)
+        return reached_end
+
+    # fetch 阶段的数据是 (标题, 日期, 链接)，parse 阶段是 ((标题, 日期, 链接), HTML, 解析结果)
+    def record_failure(self, stage, item, error):
+        url = item[2] if stage.name == "fetch" else item[0][2]
+        self.add_failure(url, stage.name, error)
+
+    def add_failure(self, url, stage_name, error):
+        with self.state_lock:
+            self.failures.append((url, stage_name, f"{type(error).__name__}: {error}"))
+            self.pending.pop(url, None)
+            self.state_dirty = True
+
+    # 过滤：关键字、已入库和本次已排队的文章不再抓取详情页
+    def filter(self, item, emit):
+        title_text, _, title_url = item
+        if title_url in self.queued_urls:
+            return  # 同一链接已在流水线中，由先到的那条负责完成
+        if title_url in self.known_urls or any(keyword in title_text for keyword in self.config.filter_keywords):
+            self.untrack(title_url)
+            return
+        self.queued_urls.add(title_url)
+        emit(item)
+
+    # 详情抓取：只下载原始 HTML，静态请求失败时由浏览器直接取回正文
+    def fetch(self, item, emit):
+        emit((item,) + self.fetcher.download_detail(item[2]))
+
+    # 解析：从 HTML 中提取正文和关键词（配置了进程池时在子进程中执行）
+    def parse(self, fetched, emit):
+        item, content, parsed = fetched
+        if parsed is None:
+            parsed = self.fetcher.parse_detail(content, item[2])
+        emit(item + tuple(parsed))
+
+    # 打标签：提取省市信息，无省名时按市补全
+    def tag(self, record, emit):
+        title_text, date_text, title_url, content_text, keywords = record
+        if self.config.tag_mode == "all":
+            province_text, city_text = self.gazetteer.tag_all(title_text)
+        else:
+            province_text, city_text = self.gazetteer.tag_first(title_text)
+        emit([title_text, date_text, province_text, city_text, ", ".join(keywords), content_text[:300], title_url])
+
+    # 入库：SQLite 连接只在入库线程中创建和使用，按批次提交
+    def store(self, data, _):
+        try:
+            self.get_writer().add(data)
+        except sqlite3.OperationalError as e:
+            # 文章已进入缓冲区，数据库被锁定时留到下一批或空闲时再提交
+            print(f"数据库暂时无法写入，稍后重试：{e}")
+            return
+        print(f"文章已录入：{data[0]}")
+
+    def get_writer(self):
+        if self.writer is None:
+            self.writer = database_manager.ArticleWriter(
+                self.config.db_name, self.config.batch_size, known_urls=self.known_urls,
+                before_commit=self.save_checkpoint,
+            )
+        return self.writer
+
+    # 在文章批次的事务中保存进度：本批文章移出待处理列表后一并提交
+    def save_checkpoint(self, connection, rows):
+        with self.state_lock:
+            for row in rows:
+                self.pending.pop(row[6], None)
+            database_manager.save_crawl_checkpoint(
+                connection, self.run_id, self.last_page, self.discovery_done, self.newest_seen,
+                list(self.pending.values()), self.failures,
+            )
+            self.state_dirty = False
+
+    # 入库队列空闲时提交缓冲的文章；没有新文章但进度有变化时单独保存进度
+    def flush(self):
+        writer = self.get_writer()
+        writer.flush()
+        if self.state_dirty:
+            with writer.connection:
+                self.save_checkpoint(writer.connection, [])
+
+    # 入库线程退出前提交剩余文章；仍然失败时这些文章留在检查点的待处理列表中
+    def close_writer(self):
+        try:
+            retry_locked(self.flush)
+        except Exception:
+            self.store_failed = True
+            raise
+        finally:
+            if self.writer is not None:
+                self.writer.connection.close()
+
+    def stop(self):
+        """停止翻页，已进入流水线的文章继续处理完"""
+        self.stopping.set()
+
+    def run(self):
+        started = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+        source = self.stages[0]
+        source.input.put(None)
+        source.input.put(STOP)
+        finished = False
+        try:
+            for stage in self.stages:
+                stage.join()
+            finished = True
+        except KeyboardInterrupt:
+            print("收到中断，停止翻页并处理完已排队的文章...")
+            self.stop()
+            for stage in self.stages:
+                stage.join()
+        finally:
+            self.fetcher.close()
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+            # 未正常结束的运行标记为 stopped，之后可以用 --resume 续爬
+            completed = finished and not self.stopping.is_set() and not self.store_failed
+            try:
+                retry_locked(database_manager.record_crawl_failures, self.failures, self.config.db_name, self.run_id)
+            except Exception as e:
+                print(f"错误：记录失败链接出错 - {e}")
+            try:
+                retry_locked(
+                    database_manager.finish_crawl_run, self.run_id, "completed" if completed else "stopped",
+                    self.config.db_name,
+                )
+            except Exception as e:
+                print(f"错误：更新运行状态出错，该运行仍可续爬 - {e}")
+
+        for stage in self.stages:
+            print(f"  {stage.name}: 处理 {stage.processed} 项，失败 {stage.errors} 项")
+        throttle_stats = self.throttle.stats()
+        print(f"  限速：重试 {throttle_stats['retries']} 次，当前并发上限 {throttle_stats['concurrency']}")
+        browser_stats = self.fetcher.browser.stats()
+        if browser_stats["started"]:
+            print(f"  浏览器：启动 {browser_stats['started']} 次，按页数重建 {browser_stats['recycled']} 次，"
+                  f"失效重建 {browser_stats['unhealthy']} 次")
+        if self.failures:
+            print(f"  {len(self.failures)} 个链接重试后仍失败，已记录到 crawl_failures 表")
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"  缓存：回放 {stats['hits']}，304 命中 {stats['revalidated']}，下载 {stats['misses']}，"
+                  f"占用 {stats['bytes'] / 1024 / 1024:.1f} MB")
+        inserted = self.writer.inserted if self.writer else 0
+        ignored = self.writer.ignored if self.writer else 0
+        print(f"本次新增 {inserted} 篇文章，跳过重复 {ignored} 篇，用时 {time.perf_counter() - started:.1f} 秒")
+        # 中途停止或最后一批未能入库时仍有文章未处理，不更新高水位线
+        return None if self.stopping.is_set() or self.store_failed else self.newest_seen
+
+
+# 按配置爬取日期范围内的文章，返回新的高水位线
+def run_crawl(config, start_date, end_date, high_water_mark=None):
+    return CrawlPipeline(config, start_date, end_date, high_water_mark).run()
+
+# 从该爬虫最近一次中断的运行继续，返回 (开始日期, 新的高水位线)；没有可续爬的运行时返回 None
+def resume_crawl(config):
+    run = database_manager.load_resumable_run(config.name, config.db_name)
+    if run is None:
+        print("没有可续爬的任务")
+        return None
+    print(f"续爬任务 #{run['id']}：{run['start_date']} 至 {run['end_date']}，"
+          f"已翻到第 {run['last_page']} 页，待处理 {len(run['pending'])} 篇")
+    high_water_mark = (run["high_water_date"], run["high_water_url"]) if run["high_water_date"] else None
+    newest_seen = CrawlPipeline(config, run["start_date"], run["end_date"], high_water_mark, resume_run=run).run()
+    return run["start_date"], newest_seen
+
+# 列出重试用尽仍失败的链接（死信），排查后可重新爬取对应日期范围
+def print_crawl_failures(db_name="news_data.db"):
+    rows = database_manager.load_crawl_failures(db_name)
+    for url, stage, error, attempts, failed_at in rows:
+        print(f"{failed_at}  {stage}  失败 {attempts} 次  {url}\n    {error}")
+    print(f"共 {len(rows)} 个失败链接")
+
+# 规范化日期格式
+def normalize_date(date_str):
+    for fmt in ("%Y/%m/%d", "%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError("日期格式错误，请使用 yyyy/mm/dd 或 yyyy-mm-dd 或 yyyymmdd 格式")
+
+# 手动任务输入和执行逻辑
+def manual_crawl(config):
+    try:
+        start_date = input("请输入开始日期 (格式: yyyy/mm/dd 或 yyyy-mm-dd 或 yyyymmdd): ").strip()
+        start_date = normalize_date(start_date)
+        end_date = input("请输入结束日期 (格式: yyyy/mm/dd 或 yyyy-mm-dd 或 yyyymmdd): ").strip()
+        end_date = normalize_date(end_date)
+
+        print(f"手动任务开始，爬取日期范围：{start_date} 至 {end_date}")
+        run_crawl(config, start_date, end_date)
+        print(f"手动任务完成")
+    except Exception as e:
+        print(f"手动任务失败: {e}")
+
+# 定时任务：爬取昨天的文章，并从上次运行的高水位线续爬，补齐错过的日期
+def collect_yesterday_news(config):
+    yesterday = datetime.now() - timedelta(days=1)
+    start_date = end_date = yesterday.strftime("%Y-%m-%d")
+
+    high_water_mark = database_manager.get_high_water_mark(config.source, config.db_name)
+    if high_water_mark and high_water_mark[0] < start_date:
+        start_date = high_water_mark[0]
+
+    print(f"正在收集 {start_date} 至 {end_date} 的新闻...")
+    newest_seen = run_crawl(config, start_date, end_date, high_water_mark)
+    database_manager.advance_high_water_mark(config.source, start_date, newest_seen, config.db_name)
+
+# 续爬上次中断的运行，完成后同样推进高水位线
+def resume_interrupted_crawl(config):
+    resumed = resume_crawl(config)
+    if resumed:
+        database_manager.advance_high_water_mark(config.source, *resumed, config.db_name)
+
+# 定时任务调度线程：每天上午 8:30
+def schedule_jobs(config):
+    schedule.every().day.at("08:30").do(collect_yesterday_news, config)
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
+
+# 命令行参数，默认值取自爬虫配置
+def parse_args(config):
+    parser = argparse.ArgumentParser(description="北极星政策新闻爬虫")
+    parser.add_argument("--cache-mode", choices=("normal", "replay", "off"), default=config.cache_mode,
+                        help="normal 使用本地缓存并条件请求验证，replay 只从缓存回放解析和打标签，off 不使用缓存")
+    parser.add_argument("--db", default=config.db_name, help="数据库文件，回放时可写入单独的库")
+    parser.add_argument("--resume", action="store_true", help="启动时先从上次中断的爬取继续")
+    parser.add_argument("--failures", action="store_true", help="列出重试后仍失败的链接后退出")
+    parser.add_argument("--chromedriver", default=config.driver_path,
+                        help="chromedriver 路径，默认读取环境变量 CHROMEDRIVER_PATH")
+    parser.add_argument("--browsers", type=int, default=config.browser_workers, help="兜底无头浏览器的数量")
+    return parser.parse_args()
+
+# 爬虫脚本的入口：解析命令行、启动定时任务，并在控制台接受手动爬取命令
+def main(config):
+    args = parse_args(config)
+    config.cache_mode = args.cache_mode
+    config.db_name = args.db
+    config.driver_path = args.chromedriver
+    config.browser_workers = args.browsers
+    database_manager.initialize_database(args.db)
+
+    if args.failures:
+        print_crawl_failures(args.db)
+        return
+
+    if args.resume:
+        resume_interrupted_crawl(config)
+
+    # 启动定时任务线程
+    threading.Thread(target=schedule_jobs, args=(config,), daemon=True).start()
+
+    print("程序启动成功。输入 'run' 手动触发爬取，输入 'exit' 退出程序。")
+
+    while True:
+        command = input(">> ").strip().lower()
+        if command == "run":
+            manual_crawl(config)
+        elif command == "exit":
+            print("程序已退出")
+            break
+        else:
+            print("未知命令，请输入 'run' 或 'exit'")
@@ -0,0 +1,85 @@
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+
+# 粗略估算查询结果占用的内存
+def estimate_size(value):
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """进程内 LRU 查询结果缓存，数据库有新的提交时整体失效"""
+
+    def __init__(self, db_path="news_data.db", max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 键 -> (结果, 估算字节数)
+        self.total_bytes = 0
+        self.data_version = None
+        self.connection = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # 其它连接（爬虫、GUI）每次提交后，长期持有的连接读到的 data_version 都会变化
+    def current_data_version(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def get_or_compute(self, key, compute):
+        """命中时直接返回缓存结果，否则执行 compute 并写入缓存"""
+        with self.lock:
+            version = self.current_data_version()
+            if version != self.data_version:
+                if self.entries:
+                    self.invalidations += 1
+                self.clear()
+                self.data_version = version
+
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+
+        with self.lock:
+            # 计算期间数据库有新提交时不写入，避免缓存过期结果
+            if self.data_version == version and size <= self.max_bytes:
+                previous = self.entries.pop(key, None)
+                if previous is not None:
+                    self.total_bytes -= previous[1]
+                self.entries[key] = (value, size)
+                self.total_bytes += size
+                while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.total_bytes -= evicted_size
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,135 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import database_manager
+from gazetteer import MAPPING_FILE, get_gazetteer
+
+# 按 id 顺序分块重新计算已入库文章的省市标签，可中断后从检查点继续
+
+
+# 创建回填进度表，每个任务记录已处理到的最大 id 及所用映射表的摘要
+def ensure_backfill_state_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_state (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            mapping_hash TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+def mapping_hash(csv_path=MAPPING_FILE):
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# 读取检查点；映射表已变化时从头开始
+def load_checkpoint(connection, name, current_hash):
+    row = connection.execute(
+        'SELECT last_id, mapping_hash FROM backfill_state WHERE name = ?', (name,)
+    ).fetchone()
+    if row is None or row[1] != current_hash:
+        return 0
+    return row[0]
+
+def save_checkpoint(connection, name, last_id, current_hash):
+    connection.execute('''
+        INSERT INTO backfill_state (name, last_id, mapping_hash, updated_at)
+        VALUES (?, ?, ?, datetime('now', 'localtime'))
+        ON CONFLICT(name) DO UPDATE SET
+            last_id = excluded.last_id,
+            mapping_hash = excluded.mapping_hash,
+            updated_at = excluded.updated_at
+    ''', (name, last_id, current_hash))
+
+# 读取一块文章：(id, 标题, 摘要, 省, 市)
+def read_chunk(connection, after_id, chunk_size):
+    return connection.execute(
+        'SELECT id, title, summary, province, city FROM articles WHERE id > ? ORDER BY id LIMIT ?',
+        (after_id, chunk_size),
+    ).fetchall()
+
+worker_gazetteer = None  # 子进程内的地名词典
+
+# 子进程初始化时构建一次地名词典
+def init_worker(csv_path):
+    global worker_gazetteer
+    worker_gazetteer = get_gazetteer(csv_path)
+
+# 在子进程中重新打标签，只返回标签有变化的行 (省, 市, id)
+def tag_chunk(rows, mode, include_summary):
+    tag = worker_gazetteer.tag_all if mode == "all" else worker_gazetteer.tag_first
+    changed = []
+    for article_id, title, summary, province, city in rows:
+        text = f"{title}\n{summary}" if include_summary and summary else title
+        new_province, new_city = tag(text)
+        if (new_province, new_city) != (province, city):
+            changed.append((new_province, new_city, article_id))
+    return changed
+
+def retag(db_name="news_data.db", csv_path=MAPPING_FILE, mode="first", include_summary=False,
+          chunk_size=2000, workers=None, restart=False):
+    workers = workers or os.cpu_count() or 1
+    name = f"retag:{mode}:{'title+summary' if include_summary else 'title'}"
+    current_hash = mapping_hash(csv_path)
+
+    connection = database_manager.connect(db_name)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    ensure_backfill_state_table(connection)
+    last_id = 0 if restart else load_checkpoint(connection, name, current_hash)
+    if last_id:
+        print(f"从检查点继续：id > {last_id}")
+
+    scanned = updated = 0
+    started = time.perf_counter()
+    pending = deque()  # 按提交顺序排列的 (块内最大 id, future)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(csv_path,)) as pool:
+        def write_oldest():
+            nonlocal updated
+            chunk_last_id, future = pending.popleft()
+            changed = future.result()
+            # 标签更新与检查点在同一事务中提交，中断后不会重复或遗漏
+            with connection:
+                connection.executemany('UPDATE articles SET province = ?, city = ? WHERE id = ?', changed)
+                save_checkpoint(connection, name, chunk_last_id, current_hash)
+            updated += len(changed)
+            print(f"已处理到 id {chunk_last_id}，扫描 {scanned} 条，更新 {updated} 条")
+
+        while True:
+            rows = read_chunk(connection, last_id, chunk_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+            pending.append((last_id, pool.submit(tag_chunk, rows, mode, include_summary)))
+            # 限制在途块数，避免读取速度远超打标签速度时占用过多内存
+            if len(pending) >= workers * 2:
+                write_oldest()
+        while pending:
+            write_oldest()
+
+    connection.close()
+    elapsed = time.perf_counter() - started
+    print(f"重新打标签完成：扫描 {scanned} 条，更新 {updated} 条，用时 {elapsed:.1f} 秒")
+    return scanned, updated
+
+def main():
+    parser = argparse.ArgumentParser(description="按最新的省市映射表重新计算已入库文章的省市标签")
+    parser.add_argument("--db", default="news_data.db", help="数据库文件")
+    parser.add_argument("--mapping", default=MAPPING_FILE, help="省市映射表")
+    parser.add_argument("--mode", choices=("first", "all"), default="first",
+                        help="first 只保留第一个省市（与入库时一致），all 保留全部匹配")
+    parser.add_argument("--include-summary", action="store_true", help="标题之外也从摘要中匹配")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块读取的文章数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    parser.add_argument("--restart", action="store_true", help="忽略检查点，从头开始")
+    args = parser.parse_args()
+
+    database_manager.initialize_database(args.db)
+    retag(args.db, args.mapping, args.mode, args.include_summary, args.chunk_size, args.workers, args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import database_manager
+from flask_frame import app
+
+# 生产环境启动入口：多线程 WSGI 服务器，每个工作线程复用自己的只读数据库连接
+def main():
+    parser = argparse.ArgumentParser(description="启动政策数据库网页服务")
+    parser.add_argument("--host", default="0.0.0.0", help="监听地址")
+    parser.add_argument("--port", type=int, default=5000, help="监听端口")
+    parser.add_argument("--threads", type=int, default=8, help="工作线程数")
+    args = parser.parse_args()
+
+    database_manager.initialize_database()
+
+    try:
+        from waitress import serve
+    except ImportError:
+        # 未安装 waitress 时退回 werkzeug 的多线程服务器
+        from werkzeug.serving import run_simple
+
+        print(f"未安装 waitress，使用 werkzeug 多线程服务器：http://{args.host}:{args.port}")
+        run_simple(args.host, args.port, app, threaded=True)
+        return
+
+    print(f"网页服务已启动：http://{args.host}:{args.port}，工作线程 {args.threads} 个")
+    serve(app, host=args.host, port=args.port, threads=args.threads)
+
+if __name__ == "__main__":
+    main()
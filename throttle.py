@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# 视为站点过载、需要退避重试的状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostLimiter:
+    """单个主机的令牌桶限速，并发上限按 AIMD 调整：成功时缓慢增加，过载时减半"""
+
+    def __init__(self, rate=4.0, burst=4, min_concurrency=1, max_concurrency=8, initial_concurrency=2):
+        self.rate = rate  # 每秒补充的令牌数
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0  # 收到 Retry-After 时暂停发请求
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(initial_concurrency)
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.active < int(self.limit) and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.active += 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.01)
+                self.condition.wait(min(wait, 1.0))
+
+    def release(self, healthy=True):
+        """healthy=True 加性增加并发上限，False 乘性减半，None 表示与站点负载无关的结果"""
+        with self.condition:
+            self.active -= 1
+            if healthy:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif healthy is False:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class Throttle:
+    """按主机限速并带抖动指数退避重试地执行请求"""
+
+    def __init__(self, rate=4.0, burst=4, max_concurrency=8, initial_concurrency=2, max_retries=3,
+                 backoff=1.0, max_backoff=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = initial_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiters = {}
+        self.lock = threading.Lock()
+        self.retries = 0
+
+    def limiter(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(
+                    self.rate, self.burst, max_concurrency=self.max_concurrency,
+                    initial_concurrency=min(self.initial_concurrency, self.max_concurrency),
+                )
+                self.limiters[host] = limiter
+            return limiter
+
+    # full jitter：在 [0, min(上限, 基数 * 2^n)] 内随机等待，避免多个线程同时重试
+    def backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def call(self, func, url, retryable):
+        """调用 func(url)；retryable(结果或异常) 为真时退避重试，重试用尽后返回最后的结果或抛出异常"""
+        limiter = self.limiter(url)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                result = func(url)
+            except Exception as e:
+                failed = retryable(e)
+                limiter.release(False if failed else None)
+                if not failed or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            else:
+                failed = retryable(result)
+                limiter.release(not failed)
+                if not failed or attempt >= self.max_retries:
+                    return result
+                delay = max(self.backoff_delay(attempt), retry_after(result))
+                limiter.pause(retry_after(result))
+            attempt += 1
+            with self.lock:
+                self.retries += 1
+            print(f"请求失败，{delay:.1f} 秒后第 {attempt} 次重试：{url}")
+            time.sleep(delay)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "retries": self.retries,
+                "concurrency": {host: round(limiter.limit, 2) for host, limiter in self.limiters.items()},
+            }
+
+
+# 读取 429/503 响应中的 Retry-After 秒数
+def retry_after(response):
+    value = getattr(response, "headers", {}).get("Retry-After", "")
+    try:
+        return min(float(value), 300.0)
+    except ValueError:
+        return 0.0
+
+
+class ThrottledSession:
+    """包装 requests 会话：GET 经过主机限速，超时、连接错误和 429/5xx 自动重试"""
+
+    def __init__(self, session, throttle):
+        self.session = session
+        self.throttle = throttle
+        self.headers = session.headers
+
+    def get(self, url, **kwargs):
+        import requests
+
+        def retryable(outcome):
+            if isinstance(outcome, Exception):
+                return isinstance(outcome, (requests.Timeout, requests.ConnectionError))
+            return outcome.status_code in RETRY_STATUS
+
+        return self.throttle.call(lambda target: self.session.get(target, **kwargs), url, retryable)
+
+    def close(self):
+        self.session.close()